@@ -1,11 +1,22 @@
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-from datetime import datetime
-from tkcalendar import DateEntry
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from fpdf import FPDF  # Biblioteca para gerar PDFs
+from datetime import date, datetime, timedelta
+from aggregates import DailyAggregates
+from analytics import TURNOS, ThroughputAnalytics, dia_do_turno, turno
+from instrumentation import profiler
+from persistence import PersistenceWorker
+from records import Concatenacao, DateIndex, PrefixIndex, RecordTable
+from refresh import RefreshScheduler
+from storage import COLUNAS, Evento, open_storage
+from table_view import PagedTable
+
+
+def DateEntry(*args, **kwargs):
+    # tkcalendar só é importado quando o primeiro calendário é criado
+    from tkcalendar import DateEntry
+    return DateEntry(*args, **kwargs)
+
 
 class ProductionApp:
     def __init__(self, root):
@@ -13,10 +24,15 @@ class ProductionApp:
         self.root.title("Gestor de Produção Industrial - v2.0")
         self.root.geometry("1200x800")
         self.setup_styles()
+        profiler.configurar("logs/latencia.log")
+        profiler.ouvintes.append(self.mostrar_latencia)
         self.load_data()
         self.create_widgets()
         self.setup_bindings()
+        self.setup_refresh()
         self.update_ui()
+        # Componentes que dependem de matplotlib/tkcalendar entram depois da janela aparecer
+        self.root.after(50, self.create_deferred_widgets)
         
     def setup_styles(self):
         self.style = ttk.Style()
@@ -29,25 +45,257 @@ class ProductionApp:
                       background=[('active', '#0052cc'), ('!active', '#4a90e2')])
 
     def load_data(self):
-        self.file_name = "producao.xlsx"
+        self.file_name = "producao.db"
+        self.storage = open_storage(self.file_name, legado="producao.xlsx")
+        self.persistencia = PersistenceWorker(self.storage)
+        self.eventos_pendentes = []
+        # Só o mês corrente da produção fica em memória; os meses anteriores são
+        # fechados e entram nas estatísticas pelos agregados gravados no banco
+        dados = self.abrir_particao()
+        self.producao = RecordTable(COLUNAS["Producao"])
+        self.producao.carregar(dados["Producao"])
+        self.manutencao = RecordTable(COLUNAS["Manutencao"], categorias=("Status",))
+        self.manutencao.carregar(dados["Manutencao"])
+        self.agregados = DailyAggregates(self.producao, self.manutencao, self.storage.archive_summary())
+        self.analise = ThroughputAnalytics(self.producao, self.manutencao, *self.liberacoes_gravadas())
+        self.indice_datas = DateIndex(self.producao)
+        self.indice_ns = PrefixIndex(self.producao, self.manutencao)
+        self.sincronizacao_incompleta = False
+        # NS liberados da manutenção nesta sessão, talvez ainda não gravados; os
+        # anteriores vêm da tabela de liberações do banco
+        self.liberados = set()
+        self.manutencao.ouvir(self._on_liberacao)
+        self.filtro = None
+        self.relatorios = None  # ReportCache, criado no primeiro relatório
+        self.pre_relatorio = None  # ReportJob da pré-geração agendada
+        self.after_pre_relatorio = None
+
+    def abrir_particao(self):
+        # Fecha os meses anteriores ao corrente e lê a partição aberta. O início dela
+        # vem do banco (load relê `fechado_ate`): outra estação pode já ter fechado
+        # um mês que esta ainda tinha em memória.
+        self.storage.close_partitions(date.today().replace(day=1).isoformat())
+        dados = self.storage.load(desde=self.storage.fechado_ate)
+        self.inicio_particao = self.storage.fechado_ate
+        return dados
+
+    def liberacoes_gravadas(self):
+        # Permanência em manutenção: o rollup por dia cobre todo o histórico; das
+        # liberações só entram as que saíram desde a véspera da partição aberta,
+        # as únicas que contam no tempo parado dos dias relatados pela aplicação
+        desde = None
+        if self.inicio_particao:
+            desde = (date.fromisoformat(self.inicio_particao) - timedelta(days=1)).isoformat()
+        return self.storage.releases(desde=desde), self.storage.dwell_summary()
+
+    def recarregar_dados(self):
+        # Releitura completa do armazenamento, usada quando a sincronização
+        # incremental entre estações não é suficiente. Se as alterações desta
+        # estação não puderam ser gravadas (banco bloqueado), reler agora as tiraria
+        # da tela: a releitura fica para a próxima sincronização e retorna False.
+        self.save_data()
+        if not self.persistencia.flush():
+            self.sincronizacao_incompleta = True
+            return False
+        dados = self.abrir_particao()
+        self.agregados.definir_arquivo(self.storage.archive_summary())
+        self.analise.definir_liberacoes(*self.liberacoes_gravadas())
+        self.producao.carregar(dados["Producao"])
+        self.manutencao.carregar(dados["Manutencao"])
+        self.sincronizacao_incompleta = False
+        return True
+
+    def sincronizar_estacoes(self):
+        # Incorpora as alterações gravadas por outras estações no mesmo arquivo.
+        # Uma falha (banco bloqueado, conflito de NS) aparece na barra de status,
+        # a próxima consulta continua agendada e faz uma releitura completa, já que
+        # parte dos eventos lidos pode não ter sido aplicada.
         try:
-            self.df_producao = pd.read_excel(self.file_name, sheet_name="Producao")
-            self.df_manutencao = pd.read_excel(self.file_name, sheet_name="Manutencao")
-        except FileNotFoundError:
-            self.df_producao = pd.DataFrame(columns=["NS", "Data", "Hora"])
-            self.df_manutencao = pd.DataFrame(columns=["NS", "Status", "Data", "Hora"])
+            if self.sincronizacao_incompleta and not self.recarregar_dados():
+                return
+            eventos, completo = self.storage.changes_since()
+            if not completo:
+                self.recarregar_dados()
+            elif eventos:
+                tabelas = {"Producao": self.producao, "Manutencao": self.manutencao}
+                for evento in eventos:
+                    tabela = tabelas[evento.tabela]
+                    if evento.acao == "inserir":
+                        if evento.ns not in tabela:
+                            tabela.inserir(evento.registro)
+                    elif evento.acao == "remover":
+                        if not tabela.remover(evento.ns) and self.arquivado(evento):
+                            self.agregados.remover_arquivado(evento.registro)
+                            self.atualizador.marcar("contador", "grafico", "estatisticas")
+                    elif evento.acao == "editar":
+                        tabela.editar(evento.ns, evento.registro)
+            # Indicadores "de hoje" e do turno mudam com a virada do dia ou do turno
+            # mesmo sem eventos; fora disso não há o que redesenhar
+            agora = datetime.now()
+            periodo = (agora.date(), turno(agora.hour))
+            if periodo != self.periodo_indicadores:
+                self.periodo_indicadores = periodo
+                self.atualizador.marcar("estatisticas", "analise")
+        except Exception as e:
+            self.sincronizacao_incompleta = True
+            self.status_bar.config(text=f"Erro ao sincronizar com outras estações: {e}")
+        finally:
+            self.root.after(2000, self.sincronizar_estacoes)
+
+    def agendar_virada_particao(self):
+        # Confere a partição a cada meia-noite: no dia 1º o mês anterior é fechado
+        # e sai da memória sem esperar a aplicação ser reaberta
+        amanha = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        espera = int((amanha - datetime.now()).total_seconds() * 1000) + 1000
+        self.root.after(espera, self.virar_particao)
+
+    def virar_particao(self):
+        try:
+            if self.inicio_particao and self.inicio_particao < date.today().replace(day=1).isoformat():
+                self.recarregar_dados()
+        except Exception as e:
+            self.sincronizacao_incompleta = True
+            self.status_bar.config(text=f"Erro ao fechar o mês: {e}")
+        finally:
+            self.agendar_virada_particao()
 
+    # Vistas no layout das planilhas para código de relatório (ex.: report.report_data)
+    @property
+    def df_producao(self):
+        return self.producao.frame()
+
+    @property
+    def df_manutencao(self):
+        return self.manutencao.frame()
+
+    @profiler.acao("save_data", fase="persistencia")
     def save_data(self):
-        with pd.ExcelWriter(self.file_name, engine="xlsxwriter") as writer:
-            self.df_producao.to_excel(writer, sheet_name="Producao", index=False)
-            self.df_manutencao.to_excel(writer, sheet_name="Manutencao", index=False)
+        # Entrega os eventos desde o último salvamento à thread de persistência
+        if self.eventos_pendentes:
+            self.persistencia.enviar(self.eventos_pendentes)
+            self.eventos_pendentes = []
+        profiler.marcar("fila")
+
+    def registrar_evento(self, tabela, acao, ns, registro=None):
+        self.eventos_pendentes.append(Evento(tabela, acao, ns, registro))
+
+    def ns_registrado(self, ns):
+        # Memória primeiro; o banco cobre os meses fechados, que não estão carregados
+        return ns in self.producao or ns in self.manutencao or ns in self.storage
+
+    def data_fechada(self, data):
+        return str(data) < self.storage.fechado_ate
+
+    def arquivado(self, evento):
+        return (evento.tabela == "Producao" and evento.registro is not None
+                and self.data_fechada(evento.registro.get("Data")))
 
     def create_widgets(self):
+        self.create_search_bar()
         self.create_notebook()
         self.create_production_tab()
         self.create_maintenance_tab()
+        self.create_analytics_tab()
         self.create_status_bar()
 
+    def create_search_bar(self):
+        # Busca por prefixo de NS nas duas tabelas, atualizada a cada tecla
+        frame = ttk.LabelFrame(self.root, text="Localizar Máquina", padding=5)
+        frame.pack(fill=tk.X, padx=10, pady=(5, 0))
+
+        ttk.Label(frame, text="NS:").pack(side=tk.LEFT)
+        self.entry_busca = ttk.Entry(frame, width=25)
+        self.entry_busca.pack(side=tk.LEFT, padx=5, anchor=tk.N)
+        self.lista_busca = tk.Listbox(frame, height=4, width=70)
+        self.lista_busca.pack(side=tk.LEFT, padx=5)
+        self.lbl_busca = ttk.Label(frame, text="")
+        self.lbl_busca.pack(side=tk.LEFT, padx=5, anchor=tk.N)
+        self.resultados_busca = []
+        self.arquivados_busca = {}  # NS -> registro de mês fechado, da última busca
+        self.liberados_busca = set()
+
+        self.entry_busca.bind("<KeyRelease>", self.buscar_ns)
+        self.entry_busca.bind("<Return>", self.ir_para_resultado)
+        self.lista_busca.bind("<Double-1>", self.ir_para_resultado)
+        self.lista_busca.bind("<Return>", self.ir_para_resultado)
+
+    def _on_liberacao(self, acao, id_, registro, anterior):
+        if acao == "remover":
+            self.liberados.add(registro["NS"])
+
+    def situacao_ns(self, ns):
+        # (tabela, descrição) de onde o NS está agora; meses fechados vêm da última busca
+        registro = self.manutencao.get(ns)
+        if registro is not None:
+            return "manutencao", f"Em manutenção ({registro['Status']}) desde {registro['Data']} {registro['Hora']}"
+        liberada = ns in self.liberados or ns in self.liberados_busca
+        situacao = "Liberada da manutenção" if liberada else "Produzida"
+        registro = self.producao.get(ns)
+        if registro is not None:
+            return "producao", f"{situacao} em {registro['Data']} {registro['Hora']}"
+        registro = self.arquivados_busca.get(ns)
+        if registro is not None:
+            return "arquivo", f"{situacao} em {registro['Data']} {registro['Hora']} (mês fechado)"
+        return None, "Não encontrada"
+
+    @profiler.acao("buscar_ns")
+    def buscar_ns(self, event=None):
+        prefixo = self.entry_busca.get().strip()
+        self.lista_busca.delete(0, tk.END)
+        if not prefixo:
+            self.resultados_busca = []
+            self.lbl_busca.config(text="")
+            return
+        # Partição aberta pelo índice em memória; meses fechados por uma faixa no
+        # índice de NS do banco, com o mesmo limite
+        vivos = self.indice_ns.buscar(prefixo, limite=20)
+        arquivados = self.storage.find_archived_prefix(prefixo, limite=20)
+        self.arquivados_busca = {registro["NS"]: registro for registro in arquivados}
+        self.resultados_busca = sorted(set(vivos) | self.arquivados_busca.keys())[:20]
+        self.liberados_busca = self.storage.released_among(self.resultados_busca)
+        total = self.indice_ns.contar(prefixo) + len(arquivados)
+        mais = "+" if len(arquivados) >= 20 else ""
+        profiler.marcar("consulta")
+        for ns in self.resultados_busca:
+            self.lista_busca.insert(tk.END, f"{ns}  —  {self.situacao_ns(ns)[1]}")
+        if total > len(self.resultados_busca):
+            self.lbl_busca.config(text=f"{len(self.resultados_busca)} de {total}{mais} encontradas")
+        else:
+            self.lbl_busca.config(text=f"{total} encontrada(s)" if total else "Nenhuma máquina encontrada")
+        profiler.marcar("exibicao")
+
+    def ir_para_resultado(self, event=None):
+        # Abre a aba da tabela onde o NS está e seleciona a linha dele
+        if not self.resultados_busca:
+            return
+        selecao = self.lista_busca.curselection()
+        ns = self.resultados_busca[selecao[0] if selecao else 0]
+        tabela, _ = self.situacao_ns(ns)
+        if tabela == "manutencao":
+            self.notebook.select(1)
+            self.atualizador.executar()
+            self.tabela_manutencao.ir_para(*self.manutencao.posicao(ns))
+        elif tabela == "producao":
+            if self.filtro:
+                self.limpar_filtro()
+            self.notebook.select(0)
+            self.atualizador.executar()
+            self.tabela_producao.ir_para(*self.producao.posicao(ns))
+        elif tabela == "arquivo":
+            # Mês fechado: a tabela passa a mostrar o dia da unidade, lido do banco
+            posicao = self.storage.archived_position(ns)
+            if posicao is None:
+                return
+            dia = self.arquivados_busca[ns]["Data"]
+            self.filtro = (dia, dia)
+            if hasattr(self, "entry_data_inicio"):
+                self.entry_data_inicio.set_date(date.fromisoformat(dia))
+                self.entry_data_fim.set_date(date.fromisoformat(dia))
+            self.notebook.select(0)
+            self.atualizador.marcar("producao", "contador")
+            self.atualizador.executar()
+            self.tabela_producao.ir_para(*posicao)
+
     def create_notebook(self):
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=True, fill='both')
@@ -86,130 +334,189 @@ class ProductionApp:
         btn_personalizado.grid(row=1, column=0, columnspan=3, pady=5)
 
         btn_relatorio = ttk.Button(frame, text="Gerar Relatório", command=self.gerar_relatorio)
-        btn_relatorio.grid(row=2, column=0, columnspan=3, pady=5)
+        btn_relatorio.grid(row=2, column=0, pady=5)
+
+        # Pré-geração diária do relatório no fim do turno, em segundo plano
+        self.var_pre_relatorio = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Pré-gerar às", variable=self.var_pre_relatorio,
+                        command=self.agendar_pre_relatorio).grid(row=2, column=1, sticky=tk.E)
+        self.entry_hora_relatorio = ttk.Entry(frame, width=6)
+        # Padrão: fim do último turno do dia produtivo (saída do 3º turno)
+        self.entry_hora_relatorio.insert(0, f"{TURNOS[-1][2]:02d}:00")
+        self.entry_hora_relatorio.grid(row=2, column=2, sticky=tk.W)
+
+        btn_lote = ttk.Button(frame, text="Importar Lote", command=self.importar_lote)
+        btn_lote.grid(row=3, column=0, columnspan=2, pady=5)
+
+        # No modo scanner cada leitura entra numa fila gravada em lote, sem pop-ups
+        self.var_scanner = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Modo Scanner", variable=self.var_scanner).grid(row=3, column=2)
+        self.fila_scanner = []
+        self.after_scanner = None
 
         self.lbl_counter = ttk.Label(frame, text="Máquinas Produzidas: 0", style='Stats.TLabel')
-        self.lbl_counter.grid(row=3, column=0, columnspan=3, pady=5)
+        self.lbl_counter.grid(row=4, column=0, columnspan=3, pady=5)
 
-    def gerar_relatorio(self):
-        # Configurações gerais do PDF
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_margins(15, 15, 15)  # Margens equilibradas
-        pdf.set_auto_page_break(True, margin=15)
-        
-        # Borda estilizada
-        pdf.set_line_width(0.5)
-        pdf.rect(5, 5, 200, 287)  # Moldura fina
-
-        # ---- CABEÇALHO ---- #
-        # Logo
-        logo_path = "logoall.jpg"
-        pdf.image(logo_path, x=20, y=12, w=25)
-        
-        # Título principal
-        pdf.set_font("Arial", 'B', 18)
-        pdf.set_xy(0, 15)
-        pdf.cell(0, 10, "Report Diário", 0, 1, 'C')
-        
-        # Data formatada
-        pdf.set_font("Arial", '', 10)
-        pdf.set_text_color(100, 100, 100)  # Cinza profissional
-        hoje = datetime.now().strftime("%d/%m/%Y")
-        pdf.cell(0, 5, f"Emitido em: {hoje}", 0, 1, 'C')
-        pdf.ln(8)
-
-        # ---- SEÇÃO DE RESUMO ---- #
-        pdf.set_line_width(0.1)  # Linhas ultra finas
-        
-        # Tabela de Resumo
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(0, 8, "Resumo Operacional", 0, 1)
-        
-        dados_resumo = [
-            ("Máquinas Hoje", len(self.df_producao[self.df_producao["Data"] == datetime.now().strftime("%Y-%m-%d")])),
-            ("Total Produção", len(self.df_producao)),
-            ("Manutenções Hoje", len(self.df_manutencao[self.df_manutencao['Data'] == datetime.now().strftime("%Y-%m-%d")])),
-            ("Total Manutenções", len(self.df_manutencao))
-        ]
-        
-        # Cabeçalho da tabela
-        pdf.set_fill_color(240, 240, 240)  # Fundo cinza claro
-        pdf.set_font("Arial", 'B', 10)
-        pdf.cell(80, 8, "Indicador", 1, 0, 'C', 1)
-        pdf.cell(40, 8, "Valor", 1, 1, 'C', 1)
-        
-        # Dados da tabela
-        pdf.set_font("Arial", '', 10)
-        pdf.set_text_color(50, 50, 50)  # Cinza escuro
-        for indicador, valor in dados_resumo:
-            pdf.cell(80, 8, indicador, 1, 0, 'L')
-            pdf.cell(40, 8, str(valor), 1, 1, 'C')
-        
-        pdf.ln(10)
-
-        # ---- IMAGEM DA MÁQUINA ---- #
-        imagem_maquina_path = "maquina.png"
-        pdf.image(imagem_maquina_path, x=150, y=46, w=41)  # Posicionamento preciso
+    def on_scan(self, event=None):
+        if not self.var_scanner.get():
+            self.produzir()
+            return
+        ns = self.entry_ns_producao.get()
+        self.entry_ns_producao.delete(0, tk.END)
+        if ns.strip():
+            self.fila_scanner.append(ns)
+        if self.after_scanner:
+            self.root.after_cancel(self.after_scanner)
+        self.after_scanner = self.root.after(400, self.confirmar_scanner)
+
+    def confirmar_scanner(self):
+        self.after_scanner = None
+        lote, self.fila_scanner = self.fila_scanner, []
+        if lote:
+            import pandas as pd
+            aceitos, rejeitados = self.registrar_lote(pd.DataFrame({"NS": lote}))
+            texto = f"Scanner: {aceitos} registrada(s)"
+            if rejeitados:
+                texto += f", {len(rejeitados)} rejeitada(s): " + ", ".join(
+                    f"{ns} ({motivo})" for _, ns, motivo in rejeitados
+                )
+            self.status_bar.config(text=texto)
+
+    def importar_lote(self):
+        file_path = filedialog.askopenfilename(filetypes=[("CSV/Texto", "*.csv *.txt"), ("Todos", "*.*")])
+        if not file_path:
+            return
+        from bulk_import import read_batch
+        try:
+            lote = read_batch(file_path)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao ler o arquivo: {str(e)}")
+            return
+        aceitos, rejeitados = self.registrar_lote(lote)
+        if rejeitados:
+            self.mostrar_rejeitados(aceitos, rejeitados)
+        else:
+            messagebox.showinfo("Sucesso", f"{aceitos} máquina(s) registrada(s) com sucesso!")
+
+    def registrar_lote(self, lote):
+        # Valida, grava numa única transação e atualiza a interface uma vez
+        from bulk_import import validate_batch
+        aceitos, rejeitados = validate_batch(lote, self.producao, self.manutencao, storage=self.storage)
+        if aceitos:
+            self.producao.estender(aceitos)
+            for registro in aceitos:
+                self.registrar_evento("Producao", "inserir", registro["NS"], registro)
+            self.save_data()
+        return len(aceitos), rejeitados
 
-        # ---- TABELA DE PRODUÇÃO ---- #
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(0, 8, "Produção do Dia", 0, 1)
-        pdf.set_font("Arial", '', 9)  # Fonte menor
-        
-        # Cabeçalho da tabela
-        colunas = ["NS", "Data", "Hora"]
-        larguras = [60, 50, 40]
-        
-        pdf.set_fill_color(240, 240, 240)
-        for i, col in enumerate(colunas):
-            pdf.cell(larguras[i], 7, col, 1, 0, 'C', 1)
-        pdf.ln()
-        
-        # Dados da tabela
-        df_producao_hoje = self.df_producao[self.df_producao["Data"] == datetime.now().strftime("%Y-%m-%d")]
-        for _, row in df_producao_hoje.iterrows():
-            pdf.cell(larguras[0], 7, str(row["NS"]), 1, 0, 'L')
-            pdf.cell(larguras[1], 7, str(row["Data"]), 1, 0, 'C')
-            pdf.cell(larguras[2], 7, str(row["Hora"]), 1, 1, 'C')
-        
-        pdf.ln(12)
-
-        # ---- GRÁFICO DE PRODUÇÃO ---- #
-        if not self.df_producao.empty:
-            # Geração do gráfico
-            plt.figure(figsize=(8, 3))  # Formato mais alongado
-            self.df_producao['Data'] = pd.to_datetime(self.df_producao['Data'])
-            daily_production = self.df_producao.groupby('Data').size()
-            
-            plt.bar(daily_production.index, daily_production.values, color='#4A90E2', width=0.8)
-            plt.xlabel('')
-            plt.ylabel('Unidades')
-            plt.gca().spines['top'].set_visible(False)
-            plt.gca().spines['right'].set_visible(False)
-            plt.grid(axis='y', linestyle='--', alpha=0.7)
-            
-            grafico_path = "grafico_producao.png"
-            plt.savefig(grafico_path, bbox_inches='tight', dpi=150)
-            plt.close()
+    def mostrar_rejeitados(self, aceitos, rejeitados):
+        top = tk.Toplevel(self.root)
+        top.title("Importação de Lote")
+        ttk.Label(top, text=f"{aceitos} registrada(s), {len(rejeitados)} rejeitada(s)").pack(pady=5)
 
-            # Inserção no PDF
-            pdf.set_font("Arial", 'B', 12)
-            pdf.cell(0, 8, "Desempenho de Produção", 0, 1)
-            pdf.image(grafico_path, x=20, y=pdf.get_y(), w=170)  # Gráfico alinhado
+        frame = ttk.Frame(top)
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        columns = ("Linha", "NS", "Motivo")
+        tree = ttk.Treeview(frame, columns=columns, show="headings")
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=120)
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscroll=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        # ---- RODAPÉ ---- #
-        pdf.set_y(265)
-        pdf.set_font("Arial", 'I', 8)
-        pdf.set_text_color(150, 150, 150)
-        pdf.cell(0, 5, "Relatório gerado automaticamente pelo Sistema de Gestão de Produção", 0, 0, 'C')
+        for linha in rejeitados:
+            tree.insert("", "end", values=linha)
+
+    def chave_relatorio(self, dia):
+        # Qualquer alteração nas tabelas ou no arquivo de meses fechados muda a chave.
+        # O relatório de hoje traz o tempo parado em manutenção até agora: vale só
+        # dentro do minuto em que foi gerado.
+        chave = (dia, self.producao.versao, self.manutencao.versao, self.agregados.versao)
+        if dia >= date.today().isoformat():
+            chave += (datetime.now().strftime("%H:%M"),)
+        return chave
+
+    def dados_relatorio(self, dia):
+        # Cópia dos dados do relatório, feita na thread da interface
+        do_dia = self.indice_datas.intervalo(dia, dia)
+        producao_dia = [valores for _, valores in do_dia.fatia(0, len(do_dia))]
+        return (dia, self.agregados.resumo(dia), producao_dia, self.agregados.serie_diaria(),
+                self.analise.resumo_dia(dia))
+
+    def cache_relatorios(self):
+        if self.relatorios is None:
+            from report import ReportCache
+            self.relatorios = ReportCache()
+        return self.relatorios
+
+    @profiler.acao("gerar_relatorio")
+    def gerar_relatorio(self):
+        import report
+        hoje = datetime.now().strftime("%Y-%m-%d")
+        chave = self.chave_relatorio(hoje)
+        pdf = self.cache_relatorios().get(chave)
+        profiler.marcar("cache")
+        if pdf is None:
+            dados = self.dados_relatorio(hoje)
+            profiler.marcar("consulta")
+            pdf = report.render_report(*dados)
+            self.relatorios.put(chave, pdf)
+            profiler.marcar("montagem")
 
         # Salvamento final
         file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")])
         if file_path:
-            pdf.output(file_path)
+            with profiler.medir("gravacao"):
+                with open(file_path, "wb") as arquivo:
+                    arquivo.write(pdf)
             messagebox.showinfo("Sucesso", f"Relatório salvo em: {file_path}")
 
+    def agendar_pre_relatorio(self):
+        if self.after_pre_relatorio:
+            self.root.after_cancel(self.after_pre_relatorio)
+            self.after_pre_relatorio = None
+        if not self.var_pre_relatorio.get():
+            self.status_bar.config(text="Pré-geração do relatório desativada")
+            return
+        try:
+            hora = datetime.strptime(self.entry_hora_relatorio.get().strip(), "%H:%M").time()
+        except ValueError:
+            self.var_pre_relatorio.set(False)
+            messagebox.showerror("Erro", "Horário inválido! Use o formato HH:MM")
+            return
+        agora = datetime.now()
+        proxima = datetime.combine(agora.date(), hora)
+        if proxima <= agora:
+            proxima += timedelta(days=1)
+        espera = int((proxima - agora).total_seconds() * 1000)
+        self.after_pre_relatorio = self.root.after(espera, self.pre_gerar_relatorio)
+        self.status_bar.config(text=f"Relatório será pré-gerado em {proxima:%d/%m %H:%M}")
+
+    def pre_gerar_relatorio(self):
+        from report import ReportJob
+        self.after_pre_relatorio = None
+        # Relatório do dia em que começou o turno que acabou de terminar
+        dia = dia_do_turno(datetime.now() - timedelta(seconds=1)).isoformat()
+        if self.pre_relatorio is None or self.pre_relatorio.concluido:
+            self.save_data()
+            self.pre_relatorio = ReportJob(
+                self.cache_relatorios(), self.chave_relatorio(dia), self.dados_relatorio(dia),
+                os.path.join("relatorios", f"relatorio_{dia}.pdf"),
+            ).start()
+            self.acompanhar_pre_relatorio()
+        self.agendar_pre_relatorio()
+
+    def acompanhar_pre_relatorio(self):
+        job = self.pre_relatorio
+        if not job.concluido:
+            self.root.after(200, self.acompanhar_pre_relatorio)
+        elif job.erro:
+            self.status_bar.config(text=f"Erro ao pré-gerar o relatório: {job.erro}")
+        else:
+            self.status_bar.config(text=f"Relatório pré-gerado: {job.file_path}")
+
     def abrir_janela_personalizada(self):
         top = tk.Toplevel(self.root)
         top.title("Inserção Personalizada")
@@ -236,19 +543,23 @@ class ProductionApp:
                 messagebox.showwarning("Aviso", "Preencha todos os campos!")
                 return
 
-            if ns in self.df_producao["NS"].values:
+            if self.ns_registrado(ns):
                 messagebox.showwarning("Aviso", "Número de série já registrado!")
                 return
 
-            novo_registro = pd.DataFrame([{
+            if self.data_fechada(data):
+                messagebox.showwarning("Aviso", "Este mês já foi fechado e não aceita novos registros!")
+                return
+
+            novo_registro = {
                 "NS": ns,
                 "Data": data,
                 "Hora": hora
-            }])
+            }
 
-            self.df_producao = pd.concat([self.df_producao, novo_registro], ignore_index=True)
+            self.producao.inserir(novo_registro)
+            self.registrar_evento("Producao", "inserir", ns, novo_registro)
             self.save_data()
-            self.update_ui()
             top.destroy()
             messagebox.showinfo("Sucesso", "Produção personalizada registrada com sucesso!")
 
@@ -276,47 +587,77 @@ class ProductionApp:
             lbl_value.pack(side=tk.LEFT)
             self.stats_labels.append(lbl_value)
 
+        self.var_latencia = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="Mostrar tempos na barra de status",
+                        variable=self.var_latencia).pack(anchor=tk.W, pady=2)
+
+    @profiler.acao("filtrar_producao")
     def filtrar_producao(self):
         try:
             data_inicio = self.entry_data_inicio.get()
             data_fim = self.entry_data_fim.get()
 
             if data_inicio and data_fim:
-                df_filtrado = self.df_producao[
-                    (self.df_producao["Data"] >= data_inicio) & 
-                    (self.df_producao["Data"] <= data_fim)
-                ]
-                self.update_table(self.tree_producao, df_filtrado)
-                self.lbl_counter.config(text=f"Máquinas Filtradas: {len(df_filtrado)}")
+                profiler.marcar("validacao")
+                self.filtro = (data_inicio, data_fim)
+                self.tabela_producao.pagina = 0
+                self.atualizador.marcar("producao", "contador")
             else:
                 messagebox.showwarning("Aviso", "Selecione ambas as datas para filtrar!")
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao filtrar: {str(e)}")
 
+    def limpar_filtro(self):
+        self.filtro = None
+        self.tabela_producao.pagina = None
+        self.atualizador.marcar("producao", "contador")
+
+    @profiler.fase("tabela")
+    def update_production_view(self):
+        # A tabela de produção respeita o filtro por data ativo
+        if self.filtro:
+            filtradas = self.indice_datas.intervalo(*self.filtro)
+            # Meses fechados vêm do banco, só antes da partição que está em memória
+            if self.filtro[0] < self.inicio_particao:
+                arquivadas = self.storage.range_view(*self.filtro, ate=self.inicio_particao)
+                filtradas = Concatenacao(arquivadas, filtradas)
+            self.tabela_producao.mostrar(filtradas)
+        else:
+            self.tabela_producao.mostrar(self.producao)
+
+    def update_counter(self):
+        if self.filtro:
+            self.lbl_counter.config(text=f"Máquinas Filtradas: {len(self.tabela_producao.fonte)}")
+        else:
+            self.lbl_counter.config(text=f"Máquinas Produzidas: {self.agregados.total_producao()}")
+
     def create_filter_section(self, parent):
         frame = ttk.LabelFrame(parent, text="Filtros Avançados", padding=10)
         frame.pack(fill=tk.X, pady=5)
 
+        # Os calendários (colunas 1 e 3) são criados em create_deferred_widgets
+        self.filter_frame = frame
         ttk.Label(frame, text="Data Início:").grid(row=0, column=0)
-        self.entry_data_inicio = DateEntry(frame, width=12, date_pattern='yyyy-mm-dd')
-        self.entry_data_inicio.grid(row=0, column=1, padx=5)
-
         ttk.Label(frame, text="Data Fim:").grid(row=0, column=2)
-        self.entry_data_fim = DateEntry(frame, width=12, date_pattern='yyyy-mm-dd')
-        self.entry_data_fim.grid(row=0, column=3, padx=5)
 
         btn_filtrar = ttk.Button(frame, text="Aplicar Filtro", command=self.filtrar_producao)
         btn_filtrar.grid(row=0, column=4, padx=5)
 
+        btn_limpar = ttk.Button(frame, text="Limpar Filtro", command=self.limpar_filtro)
+        btn_limpar.grid(row=1, column=4, padx=5, pady=5)
+
         btn_export = ttk.Button(frame, text="Exportar CSV", command=self.export_csv)
         btn_export.grid(row=0, column=5, padx=5)
 
+        btn_export_xlsx = ttk.Button(frame, text="Exportar Excel", command=self.export_xlsx)
+        btn_export_xlsx.grid(row=0, column=6, padx=5)
+
     def create_production_table(self, parent):
         frame = ttk.LabelFrame(parent, text="Histórico de Produção", padding=10)
         frame.pack(fill=tk.BOTH, expand=True)
 
         columns = ("NS", "Data", "Hora")
-        self.tree_producao = ttk.Treeview(frame, columns=columns, show="headings", selectmode='browse')
+        self.tree_producao = ttk.Treeview(frame, columns=columns, show="headings", selectmode='extended')
         
         for col in columns:
             self.tree_producao.heading(col, text=col)
@@ -324,6 +665,7 @@ class ProductionApp:
 
         scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree_producao.yview)
         self.tree_producao.configure(yscroll=scrollbar.set)
+        self.tabela_producao = PagedTable(self.tree_producao, frame)
         
         self.tree_producao.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -331,12 +673,34 @@ class ProductionApp:
     def create_chart_section(self, parent):
         frame = ttk.LabelFrame(parent, text="Desempenho de Produção", padding=10)
         frame.pack(fill=tk.BOTH, expand=True)
+        self.chart_frame = frame
+        self.canvas = None
 
-        self.fig = plt.Figure(figsize=(6, 4), dpi=100)
+    def create_deferred_widgets(self):
+        self.entry_data_inicio = DateEntry(self.filter_frame, width=12, date_pattern='yyyy-mm-dd')
+        self.entry_data_inicio.grid(row=0, column=1, padx=5)
+        self.entry_data_fim = DateEntry(self.filter_frame, width=12, date_pattern='yyyy-mm-dd')
+        self.entry_data_fim.grid(row=0, column=3, padx=5)
+        self.create_chart()
+        self.update_chart()
+
+    def create_chart(self):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+        self.fig = Figure(figsize=(6, 4), dpi=100)
         self.ax = self.fig.add_subplot(111)
-        self.canvas = FigureCanvasTkAgg(self.fig, master=frame)
+        self.ax.set_xlabel('Data')
+        self.ax.set_ylabel('Quantidade Produzida')
+        self.ax.set_title('Produção Diária')
+        self.ax.grid(True)
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.chart_frame)
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
+        # Barras desenhadas: reaproveitadas enquanto os dias do gráfico não mudam
+        self.barras = None
+        self.serie_grafico = ()
+
     def create_maintenance_tab(self):
         tab = ttk.Frame(self.notebook)
         self.notebook.add(tab, text="Controle de Manutenção")
@@ -349,7 +713,8 @@ class ProductionApp:
         frame = ttk.LabelFrame(left_panel, text="Registro de Manutenção", padding=10)
         frame.pack(fill=tk.X, pady=5)
 
-        ttk.Label(frame, text="Número de Série:").grid(row=0, column=0)
+        # Aceita vários NS separados por espaço, vírgula ou ponto e vírgula
+        ttk.Label(frame, text="Número(s) de Série:").grid(row=0, column=0)
         self.entry_ns_manutencao = ttk.Entry(frame, width=25)
         self.entry_ns_manutencao.grid(row=0, column=1, padx=5)
 
@@ -360,6 +725,12 @@ class ProductionApp:
         btn_registrar = ttk.Button(frame, text="Registrar Manutenção", command=self.registrar_manutencao)
         btn_registrar.grid(row=2, column=0, columnspan=2, pady=5)
 
+        btn_selecao = ttk.Button(frame, text="Enviar Seleção da Produção", command=self.enviar_selecao_manutencao)
+        btn_selecao.grid(row=3, column=0, columnspan=2, pady=5)
+
+        btn_liberar_lista = ttk.Button(frame, text="Liberar NS Informados", command=self.liberar_lista)
+        btn_liberar_lista.grid(row=4, column=0, columnspan=2, pady=5)
+
         # Painel direito
         right_panel = ttk.Frame(tab)
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -369,7 +740,7 @@ class ProductionApp:
         frame.pack(fill=tk.BOTH, expand=True)
 
         columns = ("NS", "Status", "Data", "Hora")
-        self.tree_manutencao = ttk.Treeview(frame, columns=columns, show="headings", selectmode='browse')
+        self.tree_manutencao = ttk.Treeview(frame, columns=columns, show="headings", selectmode='extended')
         
         for col in columns:
             self.tree_manutencao.heading(col, text=col)
@@ -377,6 +748,7 @@ class ProductionApp:
 
         scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.tree_manutencao.yview)
         self.tree_manutencao.configure(yscroll=scrollbar.set)
+        self.tabela_manutencao = PagedTable(self.tree_manutencao, frame)
         
         self.tree_manutencao.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -385,141 +757,311 @@ class ProductionApp:
         btn_liberar = ttk.Button(frame, text="Liberar Manutenção", command=self.liberar_manutencao)
         btn_liberar.pack(pady=5)
 
+    @profiler.acao("liberar_manutencao")
     def liberar_manutencao(self):
         selected = self.tree_manutencao.selection()
         if not selected:
             messagebox.showwarning("Aviso", "Selecione uma máquina para liberar!")
             return
+        profiler.marcar("validacao")
+        self.liberar([self.tree_manutencao.item(item, "values")[0] for item in selected])
+
+    @profiler.acao("liberar_manutencao")
+    def liberar_lista(self):
+        lista = self.ler_lista_ns()
+        if not lista:
+            messagebox.showwarning("Aviso", "Digite o(s) número(s) de série!")
+            return
+        nao_encontrados = [ns for ns in lista if ns not in self.manutencao]
+        if nao_encontrados:
+            messagebox.showwarning("Aviso", "Fora da manutenção: " + ", ".join(nao_encontrados[:20]))
+            return
+        profiler.marcar("validacao")
+        self.liberar(lista)
+        self.entry_ns_manutencao.delete(0, tk.END)
 
-        for item in selected:
-            ns = self.tree_manutencao.item(item, "values")[0]
-            
-            # Remove da manutenção
-            self.df_manutencao = self.df_manutencao[self.df_manutencao["NS"] != ns]
-            
-            # Adiciona de volta à produção
-            data_atual = datetime.now().strftime("%Y-%m-%d")
-            hora_atual = datetime.now().strftime("%H:%M:%S")
-            novo_registro = pd.DataFrame([{
-                "NS": ns,
-                "Data": data_atual,
-                "Hora": hora_atual
-            }])
-            self.df_producao = pd.concat([self.df_producao, novo_registro], ignore_index=True)
+    def liberar(self, lista):
+        # Move o lote da manutenção de volta à produção com um único salvamento e atualização
+        removidos = self.manutencao.remover_varios(lista)
+        agora = datetime.now()
+        novos = [{"NS": registro["NS"], "Data": agora.strftime("%Y-%m-%d"), "Hora": agora.strftime("%H:%M:%S")}
+                 for registro in removidos]
+        self.producao.estender(novos)
+        for registro in removidos:
+            self.registrar_evento("Manutencao", "remover", registro["NS"])
+        for registro in novos:
+            self.registrar_evento("Producao", "inserir", registro["NS"], registro)
+        profiler.marcar("mutacao")
 
         self.save_data()
-        self.update_ui()
-        messagebox.showinfo("Sucesso", "Máquina(s) liberada(s) com sucesso!")
+        messagebox.showinfo("Sucesso", f"{len(novos)} máquina(s) liberada(s) com sucesso!")
+
+    def create_analytics_tab(self):
+        tab = ttk.Frame(self.notebook)
+        self.notebook.add(tab, text="Produtividade")
+
+        # Painel esquerdo: turnos e indicadores do dia
+        left_panel = ttk.Frame(tab)
+        left_panel.pack(side=tk.LEFT, fill=tk.BOTH, padx=10, pady=10)
+
+        # O 3º turno de ontem continua depois da meia-noite: conta o dia em que o turno atual começou
+        frame = ttk.LabelFrame(left_panel, text="Produção por Turno (dia do turno atual)", padding=10)
+        frame.pack(fill=tk.X, pady=5)
+        self.turno_labels = []
+        for i, (nome, inicio, fim) in enumerate(TURNOS):
+            ttk.Label(frame, text=f"{nome} ({inicio:02d}h-{fim:02d}h):").grid(row=i, column=0, sticky=tk.W)
+            lbl = ttk.Label(frame, text="0", style='Stats.TLabel')
+            lbl.grid(row=i, column=1, sticky=tk.E, padx=5)
+            self.turno_labels.append(lbl)
+
+        frame = ttk.LabelFrame(left_panel, text="Indicadores", padding=10)
+        frame.pack(fill=tk.X, pady=5)
+        self.indicador_labels = []
+        for i, (nome, _) in enumerate(self.analise.resumo_dia(self.agregados.hoje())["indicadores"]):
+            ttk.Label(frame, text=f"{nome}:").grid(row=i, column=0, sticky=tk.W)
+            lbl = ttk.Label(frame, text="-", style='Stats.TLabel')
+            lbl.grid(row=i, column=1, sticky=tk.E, padx=5)
+            self.indicador_labels.append(lbl)
+
+        # Painel direito: unidades por hora
+        right_panel = ttk.Frame(tab)
+        right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10, pady=10)
+        frame = ttk.LabelFrame(right_panel, text="Unidades por Hora (hoje)", padding=10)
+        frame.pack(fill=tk.BOTH, expand=True)
+        columns = ("Hora", "Turno", "Unidades")
+        self.tree_horas = ttk.Treeview(frame, columns=columns, show="headings")
+        for col in columns:
+            self.tree_horas.heading(col, text=col)
+            self.tree_horas.column(col, width=100)
+        for hora in range(24):
+            self.tree_horas.insert("", "end", iid=str(hora), values=(f"{hora:02d}:00", turno(hora), 0))
+        self.tree_horas.pack(fill=tk.BOTH, expand=True)
+        self.versao_analise = None
+
+    @profiler.fase("analise")
+    def update_analytics(self):
+        # Os rollups já estão prontos; só redesenha se algo mudou (ou o dia virou)
+        hoje = self.agregados.hoje()
+        dia_turno = dia_do_turno(datetime.now()).isoformat()
+        if (self.analise.versao, hoje, dia_turno) == self.versao_analise:
+            return
+        self.versao_analise = (self.analise.versao, hoje, dia_turno)
+        resumo = self.analise.resumo_dia(hoje)
+        for lbl, (_, unidades) in zip(self.turno_labels, self.analise.por_turno(dia_turno)):
+            lbl.config(text=str(unidades))
+        for lbl, (_, valor) in zip(self.indicador_labels, resumo["indicadores"]):
+            lbl.config(text=valor)
+        for hora, unidades in self.analise.por_hora(hoje):
+            self.tree_horas.set(str(hora), "Unidades", unidades)
 
     def create_status_bar(self):
         self.status_bar = ttk.Label(self.root, text="Pronto", relief=tk.SUNKEN, anchor=tk.W)
         self.status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.estado_salvamento = PersistenceWorker.SALVO
+        self.acompanhar_salvamento()
+        self.root.after(2000, self.sincronizar_estacoes)
+        self.agendar_virada_particao()
+
+    def acompanhar_salvamento(self):
+        estado = self.persistencia.estado
+        if estado != self.estado_salvamento:
+            self.estado_salvamento = estado
+            if estado == PersistenceWorker.PENDENTE:
+                self.status_bar.config(text="Salvando alterações...")
+            elif estado == PersistenceWorker.SALVO:
+                self.status_bar.config(text="Todas as alterações salvas")
+            else:
+                self.status_bar.config(text=f"Falha ao salvar: {self.persistencia.erro}")
+        recusados = self.persistencia.take_rejected()
+        if recusados:
+            # Outra estação registrou o mesmo NS ou fechou o mês antes: vale o que está no arquivo
+            self.recarregar_dados()
+            self.status_bar.config(text="Registro(s) recusado(s) (NS já existente em outra estação "
+                                   "ou mês fechado): " +
+                                   ", ".join(evento.ns for evento in recusados))
+        self.root.after(250, self.acompanhar_salvamento)
+
+    def mostrar_latencia(self, acao, total, fases):
+        if not self.var_latencia.get():
+            return
+        detalhes = ", ".join(f"{fase} {ms:.1f}" for fase, ms in fases.items())
+        p95 = profiler.percentis(acao)["p95"]
+        self.status_bar.config(text=f"{acao}: {total:.1f} ms ({detalhes}) | p95 {p95:.1f} ms")
 
     def setup_bindings(self):
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.tree_producao.bind("<Double-1>", self.on_item_double_click)
+        self.entry_ns_producao.bind("<Return>", self.on_scan)
+
+    def setup_refresh(self):
+        # Cada vista é redesenhada uma vez por rodada ociosa do Tk, e só se algum
+        # evento das tabelas (ou filtro) a marcou como suja
+        self.atualizador = RefreshScheduler(self.root)
+        self.periodo_indicadores = None  # (dia, turno) dos indicadores na tela
+        self.atualizador.registrar("producao", self.update_production_view)
+        self.atualizador.registrar("contador", self.update_counter)
+        self.atualizador.registrar("manutencao", self.update_maintenance_view)
+        self.atualizador.registrar("grafico", self.update_chart)
+        self.atualizador.registrar("estatisticas", self.update_stats)
+        self.atualizador.registrar("analise", self.update_analytics)
+        self.producao.ouvir(lambda *evento: self.atualizador.marcar(
+            "producao", "contador", "grafico", "estatisticas", "analise"))
+        self.manutencao.ouvir(lambda *evento: self.atualizador.marcar(
+            "manutencao", "estatisticas", "analise"))
 
     def update_ui(self):
-        self.update_table(self.tree_producao, self.df_producao)
-        self.update_table(self.tree_manutencao, self.df_manutencao)
-        self.update_chart()
-        self.update_stats()
-        self.lbl_counter.config(text=f"Máquinas Produzidas: {len(self.df_producao)}")
+        # Os eventos das tabelas já marcam as vistas afetadas; aqui só se garante
+        # que um redesenho está agendado (sem argumentos, marca todas)
+        self.atualizador.marcar()
 
-    def update_table(self, tree, df):
-        tree.delete(*tree.get_children())
-        for _, row in df.iterrows():
-            tree.insert("", "end", values=list(row))
+    @profiler.fase("tabela")
+    def update_maintenance_view(self):
+        self.tabela_manutencao.mostrar(self.manutencao)
 
+    @profiler.fase("estatisticas")
     def update_stats(self):
-        if not self.df_producao.empty:
-            # Calcula estatísticas de produção
-            daily_avg = len(self.df_producao) / self.df_producao['Data'].nunique()
-            last_ns = self.df_producao['NS'].iloc[-1]
-            maintenance_count = len(self.df_manutencao)
-            
-            # Calcula manutenções do dia
-            hoje = datetime.now().strftime("%Y-%m-%d")
-            manutencoes_hoje = len(self.df_manutencao[self.df_manutencao['Data'] == hoje])
+        # No início do mês a partição aberta está vazia, mas os meses fechados contam
+        if self.agregados.total_producao():
+            # Estatísticas vindas do cache de agregados
+            daily_avg = self.agregados.media_diaria()
+            last_ns = self.agregados.ultimo_ns
+            maintenance_count = len(self.manutencao)
+            manutencoes_hoje = self.agregados.manutencoes_hoje()
             
             # Atualiza labels
             self.stats_labels[0].config(text=f"{daily_avg:.1f}")
-            self.stats_labels[1].config(text=last_ns)
+            self.stats_labels[1].config(text=last_ns or "-")
             self.stats_labels[2].config(text=str(maintenance_count))
             self.stats_labels[3].config(text=str(manutencoes_hoje))
 
+    @profiler.fase("grafico")
     def update_chart(self):
-        if not self.df_producao.empty:
-            self.ax.clear()
-            self.df_producao['Data'] = pd.to_datetime(self.df_producao['Data'])
-            daily_production = self.df_producao.groupby('Data').size()
-            
-            self.ax.bar(daily_production.index, daily_production.values)
-            self.ax.set_xlabel('Data')
-            self.ax.set_ylabel('Quantidade Produzida')
-            self.ax.set_title('Produção Diária')
-            self.ax.grid(True)
-            
-            self.canvas.draw()
+        if self.canvas is None:
+            return
+        serie = tuple(self.agregados.serie_diaria())
+        if serie == self.serie_grafico:
+            return
 
+        dias = tuple(dia for dia, _ in serie)
+        unidades = [quantidade for _, quantidade in serie]
+        if self.barras is not None and dias == tuple(dia for dia, _ in self.serie_grafico):
+            # Mesmos dias: só as alturas mudam
+            for barra, altura in zip(self.barras, unidades):
+                barra.set_height(altura)
+        else:
+            if self.barras is not None:
+                self.barras.remove()
+                self.barras = None
+            if serie:
+                self.barras = self.ax.bar([datetime.strptime(d, "%Y-%m-%d") for d in dias], unidades)
+        self.serie_grafico = serie
+
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.canvas.draw_idle()
+
+    @profiler.acao("produzir")
     def produzir(self):
         ns = self.entry_ns_producao.get().strip()
         if not ns:
             messagebox.showwarning("Aviso", "Digite o número de série!")
             return
 
-        if ns in self.df_producao["NS"].values:
+        if self.ns_registrado(ns):
             messagebox.showwarning("Aviso", "Número de série já registrado!")
             return
+        profiler.marcar("validacao")
 
         data_atual = datetime.now().strftime("%Y-%m-%d")
         hora_atual = datetime.now().strftime("%H:%M:%S")
 
-        novo_registro = pd.DataFrame([{
+        novo_registro = {
             "NS": ns,
             "Data": data_atual,
             "Hora": hora_atual
-        }])
+        }
 
-        self.df_producao = pd.concat([self.df_producao, novo_registro], ignore_index=True)
+        self.producao.inserir(novo_registro)
+        self.registrar_evento("Producao", "inserir", ns, novo_registro)
+        profiler.marcar("mutacao")
         self.save_data()
-        self.update_ui()
         self.entry_ns_producao.delete(0, tk.END)
         messagebox.showinfo("Sucesso", "Produção registrada com sucesso!")
 
+    @profiler.acao("registrar_manutencao")
     def registrar_manutencao(self):
-        ns = self.entry_ns_manutencao.get().strip()
-        if not ns:
+        lista = self.ler_lista_ns()
+        if not lista:
             messagebox.showwarning("Aviso", "Digite o número de série!")
             return
+        if self.mover_para_manutencao(lista):
+            self.entry_ns_manutencao.delete(0, tk.END)
 
-        if ns not in self.df_producao["NS"].values:
-            messagebox.showwarning("Aviso", "Número de série não encontrado na produção!")
+    @profiler.acao("registrar_manutencao")
+    def enviar_selecao_manutencao(self):
+        selected = self.tree_producao.selection()
+        if not selected:
+            messagebox.showwarning("Aviso", "Selecione as máquinas na tabela de produção!")
             return
-
-        # Remove da produção
-        self.df_producao = self.df_producao[self.df_producao["NS"] != ns]
-
-        data_atual = datetime.now().strftime("%Y-%m-%d")
-        hora_atual = datetime.now().strftime("%H:%M:%S")
+        self.mover_para_manutencao([self.tree_producao.item(item, "values")[0] for item in selected])
+
+    def ler_lista_ns(self):
+        texto = self.entry_ns_manutencao.get().replace(",", " ").replace(";", " ")
+        return list(dict.fromkeys(texto.split()))
+
+    def mover_para_manutencao(self, lista):
+        # Valida o lote inteiro antes de mexer nas tabelas; unidades de meses
+        # fechados são buscadas no banco
+        em_manutencao = [ns for ns in lista if ns in self.manutencao]
+        if em_manutencao:
+            # Unidade de mês fechado enviada de novo antes da gravação ainda consta no arquivo
+            messagebox.showwarning("Aviso", "Número(s) de série já em manutenção: "
+                                   + ", ".join(em_manutencao[:20]))
+            return False
+        arquivados = {}
+        nao_encontrados = []
+        for ns in lista:
+            if ns not in self.producao:
+                registro = self.storage.find_archived(ns)
+                if registro is None:
+                    nao_encontrados.append(ns)
+                else:
+                    arquivados[ns] = registro
+        if nao_encontrados:
+            messagebox.showwarning("Aviso", "Número(s) de série não encontrado(s) na produção: "
+                                   + ", ".join(nao_encontrados[:20]))
+            return False
+        profiler.marcar("validacao")
+
+        # Remove da produção (o registro vai junto para as outras estações
+        # ajustarem os agregados de meses fechados)
+        removidos = self.producao.remover_varios([ns for ns in lista if ns not in arquivados])
+        for registro in arquivados.values():
+            self.agregados.remover_arquivado(registro)
+            self.atualizador.marcar("contador", "grafico", "estatisticas")
+        removidos.extend(arquivados.values())
+
+        agora = datetime.now()
         status = self.var_status.get()
-
-        novo_registro = pd.DataFrame([{
-            "NS": ns,
-            "Status": status,
-            "Data": data_atual,
-            "Hora": hora_atual
-        }])
-
-        self.df_manutencao = pd.concat([self.df_manutencao, novo_registro], ignore_index=True)
+        novos = [{"NS": registro["NS"], "Status": status,
+                  "Data": agora.strftime("%Y-%m-%d"), "Hora": agora.strftime("%H:%M:%S")}
+                 for registro in removidos]
+        self.manutencao.estender(novos)
+        for registro in removidos:
+            self.registrar_evento("Producao", "remover", registro["NS"], registro)
+        for registro in novos:
+            self.registrar_evento("Manutencao", "inserir", registro["NS"], registro)
+        profiler.marcar("mutacao")
         self.save_data()
-        self.update_ui()
-        self.entry_ns_manutencao.delete(0, tk.END)
-        messagebox.showinfo("Sucesso", "Manutenção registrada com sucesso!")
+        messagebox.showinfo("Sucesso", f"Manutenção registrada para {len(novos)} máquina(s)!")
+        return True
 
     def on_item_double_click(self, event):
         item = self.tree_producao.selection()[0]
         values = self.tree_producao.item(item, 'values')
+        if self.data_fechada(values[1]):
+            messagebox.showwarning("Aviso", "Registros de meses fechados não podem ser editados!")
+            return
         
         top = tk.Toplevel(self.root)
         top.title("Editar Registro")
@@ -540,25 +1082,94 @@ class ProductionApp:
         entry_hora.insert(0, values[2])
         
         def salvar_edicao():
-            self.df_producao.at[self.df_producao["NS"] == values[0], "NS"] = entry_ns.get()
-            self.df_producao.at[self.df_producao["NS"] == values[0], "Data"] = entry_data.get()
-            self.df_producao.at[self.df_producao["NS"] == values[0], "Hora"] = entry_hora.get()
-            self.save_data()
-            self.update_ui()
+            campos = {
+                "NS": entry_ns.get().strip(),
+                "Data": entry_data.get(),
+                "Hora": entry_hora.get().strip()
+            }
+            if self.data_fechada(campos["Data"]):
+                messagebox.showwarning("Aviso", "Este mês já foi fechado e não aceita novos registros!")
+                return
+            try:
+                self.atualizar_registro(values[0], campos)
+            except (KeyError, ValueError) as e:
+                messagebox.showwarning("Aviso", str(e).strip("'\""))
+                return
             top.destroy()
             messagebox.showinfo("Sucesso", "Registro atualizado!")
-        
-        ttk.Button(top, text="Salvar", command=salvar_edicao).grid(row=3, column=0, columnspan=2)
+
+        def mostrar_historico():
+            linhas = [
+                f"{momento} ({estacao}): " + ", ".join(f"{campo} {antes} → {depois}"
+                                                      for campo, (antes, depois) in alteracoes.items())
+                for momento, estacao, _, alteracoes in self.storage.history(values[0])
+            ]
+            messagebox.showinfo("Histórico", "\n".join(linhas[-30:]) or "Nenhuma alteração registrada.", parent=top)
+
+        ttk.Button(top, text="Salvar", command=salvar_edicao).grid(row=3, column=0)
+        ttk.Button(top, text="Histórico", command=mostrar_historico).grid(row=3, column=1)
+
+    @profiler.acao("atualizar_registro")
+    def atualizar_registro(self, ns, campos):
+        # Atualização pela chave: só os campos alterados viram evento, e um NS novo
+        # não pode colidir com nenhuma tabela nem com os meses fechados
+        atual = self.producao.get(ns)
+        if atual is None:
+            raise KeyError(f"Número de série {ns} não encontrado")
+        campos = {c: v for c, v in campos.items() if v != atual.get(c)}
+        if not campos:
+            return atual
+        novo_ns = campos.get("NS", ns)
+        if not novo_ns:
+            raise ValueError("Número de série vazio")
+        if novo_ns != ns and self.ns_registrado(novo_ns):
+            raise ValueError(f"Número de série {novo_ns} já registrado")
+        profiler.marcar("validacao")
+        registro = self.producao.editar(ns, campos)
+        self.registrar_evento("Producao", "editar", ns, campos)
+        profiler.marcar("mutacao")
+        self.save_data()
+        return registro
 
     def export_csv(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv")
+        from export import FORMATOS, ExportJob
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=FORMATOS)
         if file_path:
-            self.df_producao.to_csv(file_path, index=False)
-            self.status_bar.config(text=f"Arquivo exportado: {file_path}")
+            # Exporta o que está gravado, respeitando o filtro por data ativo
+            self.save_data()
+            self.persistencia.flush()
+            self.exportacao = ExportJob(self.storage, file_path, self.filtro).start()
+            self.acompanhar_exportacao()
+
+    def acompanhar_exportacao(self):
+        job = self.exportacao
+        if not job.concluido:
+            self.status_bar.config(text=f"Exportando... {job.progresso():.0%}")
+            self.root.after(200, self.acompanhar_exportacao)
+        elif job.erro:
+            self.status_bar.config(text=f"Erro ao exportar: {job.erro}")
+        else:
+            self.status_bar.config(text=f"Arquivo exportado: {', '.join(job.caminhos.values())}")
+
+    def export_xlsx(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
+        if file_path:
+            self.save_data()
+            self.persistencia.flush()
+            self.storage.export_xlsx(file_path)
+            self.status_bar.config(text=f"Planilha exportada: {file_path}")
 
     def on_close(self):
         if messagebox.askokcancel("Sair", "Deseja realmente sair?"):
             self.save_data()
+            if not self.persistencia.close(timeout=30):
+                if not messagebox.askyesno(
+                    "Erro",
+                    f"Não foi possível salvar os dados: {self.persistencia.erro}\n"
+                    "Sair mesmo assim e perder as alterações pendentes?"
+                ):
+                    return
+            self.storage.close()
             self.root.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+from collections import Counter
+from datetime import datetime
+
+
+class DailyAggregates:
+    # Contadores por dia mantidos a partir dos eventos das tabelas,
+    # para que gráfico, estatísticas e relatório não reprocessem os DataFrames.
+    # `arquivo` traz os agregados dos meses fechados, que não ficam em memória.
+    def __init__(self, producao, manutencao, arquivo=None):
+        self.producao = producao
+        self.manutencao = manutencao
+        self.versao = 0
+        self.definir_arquivo(arquivo)
+        self.recalcular()
+        producao.ouvir(self._on_producao)
+        manutencao.ouvir(self._on_manutencao)
+
+    def definir_arquivo(self, arquivo):
+        arquivo = arquivo or {}
+        self.arquivo_por_dia = Counter(arquivo.get("producao_por_dia", ()))
+        self.arquivo_total = arquivo.get("total", 0)
+        self.arquivo_ultimo_ns = arquivo.get("ultimo_ns")
+        self.versao += 1
+
+    def remover_arquivado(self, registro):
+        # Unidade de um mês fechado saiu da produção (foi para manutenção)
+        self._somar(self.arquivo_por_dia, registro["Data"], -1)
+        self.arquivo_total -= 1
+        self.versao += 1
+
+    def recalcular(self):
+        self.producao_por_dia = self.producao.por_dia()
+        self.manutencao_por_dia = self.manutencao.por_dia()
+        ultimo = self.producao.ultimo()
+        self.ultimo_ns = ultimo["NS"] if ultimo else self.arquivo_ultimo_ns
+        self.versao += 1
+
+    @staticmethod
+    def _somar(contador, dia, delta):
+        dia = str(dia)
+        contador[dia] += delta
+        if contador[dia] <= 0:
+            del contador[dia]
+
+    def _on_producao(self, acao, id_, registro, anterior):
+        if acao == "carregar":
+            self.recalcular()
+            return
+        if acao == "inserir":
+            self._somar(self.producao_por_dia, registro["Data"], 1)
+            self.ultimo_ns = registro["NS"]
+        elif acao == "remover":
+            self._somar(self.producao_por_dia, registro["Data"], -1)
+            if registro["NS"] == self.ultimo_ns:
+                ultimo = self.producao.ultimo()
+                self.ultimo_ns = ultimo["NS"] if ultimo else self.arquivo_ultimo_ns
+        elif acao == "editar":
+            self._somar(self.producao_por_dia, anterior["Data"], -1)
+            self._somar(self.producao_por_dia, registro["Data"], 1)
+            if anterior["NS"] == self.ultimo_ns:
+                self.ultimo_ns = self.producao.ultimo()["NS"]
+        self.versao += 1
+
+    def _on_manutencao(self, acao, id_, registro, anterior):
+        if acao == "carregar":
+            self.recalcular()
+            return
+        if acao == "inserir":
+            self._somar(self.manutencao_por_dia, registro["Data"], 1)
+        elif acao == "remover":
+            self._somar(self.manutencao_por_dia, registro["Data"], -1)
+        elif acao == "editar":
+            self._somar(self.manutencao_por_dia, anterior["Data"], -1)
+            self._somar(self.manutencao_por_dia, registro["Data"], 1)
+        self.versao += 1
+
+    @staticmethod
+    def hoje():
+        return datetime.now().strftime("%Y-%m-%d")
+
+    def dias_distintos(self):
+        return len(self.producao_por_dia.keys() | self.arquivo_por_dia.keys())
+
+    def total_producao(self):
+        return len(self.producao) + self.arquivo_total
+
+    def media_diaria(self):
+        dias = self.dias_distintos()
+        return self.total_producao() / dias if dias else 0.0
+
+    def producao_hoje(self, dia=None):
+        return self.producao_por_dia.get(dia or self.hoje(), 0)
+
+    def manutencoes_hoje(self, dia=None):
+        return self.manutencao_por_dia.get(dia or self.hoje(), 0)
+
+    def serie_diaria(self):
+        # (dia, unidades) em ordem cronológica; custo proporcional ao número de dias
+        return sorted((self.arquivo_por_dia + self.producao_por_dia).items())
+
+    def resumo(self, dia=None):
+        # Indicadores "de hoje" referentes a `dia` (padrão: hoje), para relatórios de outros dias
+        return [
+            ("Máquinas Hoje", self.producao_hoje(dia)),
+            ("Total Produção", self.total_producao()),
+            ("Manutenções Hoje", self.manutencoes_hoje(dia)),
+            ("Total Manutenções", len(self.manutencao))
+        ]
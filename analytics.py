@@ -0,0 +1,225 @@
+import bisect
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from records import IRREGULAR, instante, texto_dia
+
+_EPOCA = datetime(1970, 1, 1)
+
+TURNOS = [
+    ("1º Turno", 6, 14),
+    ("2º Turno", 14, 22),
+    ("3º Turno", 22, 6),
+]
+
+
+def turno(hora):
+    for nome, inicio, fim in TURNOS:
+        if (inicio <= hora < fim) if inicio < fim else (hora >= inicio or hora < fim):
+            return nome
+    return None
+
+
+def dia_do_turno(momento):
+    # Dia em que começou o turno que contém `momento`: depois da meia-noite,
+    # o turno que vira o dia ainda é o da véspera
+    for _, inicio, fim in TURNOS:
+        if inicio > fim and momento.hour < fim:
+            return (momento - timedelta(days=1)).date()
+    return momento.date()
+
+
+def _instante(registro):
+    try:
+        return datetime.strptime(f"{registro['Data']} {registro['Hora']}", "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp_texto(texto):
+    # "AAAA-MM-DD HH:MM:SS" da tabela de liberações -> datetime.timestamp(), ou None
+    try:
+        return datetime.strptime(texto, "%Y-%m-%d %H:%M:%S").timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _timestamp(valor):
+    # Instante de RecordTable (segundos desde 1970, hora local) -> datetime.timestamp()
+    return (_EPOCA + timedelta(seconds=valor)).timestamp()
+
+
+def formatar_duracao(segundos):
+    if segundos is None:
+        return "-"
+    segundos = int(segundos)
+    horas, resto = divmod(segundos, 3600)
+    return f"{horas}h{resto // 60:02d}" if horas else f"{resto // 60}min{resto % 60:02d}s"
+
+
+class ThroughputAnalytics:
+    # Produtividade por hora e turno, intervalo entre séries e permanência em manutenção,
+    # mantidos pelos eventos das tabelas como DailyAggregates.
+    # Cobre a partição carregada (mês corrente); a permanência concluída vem do
+    # rollup gravado por dia (`permanencias`) mais as liberações desta sessão.
+    def __init__(self, producao, manutencao, liberacoes=(), permanencias=None):
+        self.producao = producao
+        self.manutencao = manutencao
+        self.versao = 0
+        self.definir_liberacoes(liberacoes, permanencias)
+        self.recalcular()
+        producao.ouvir(self._on_producao)
+        manutencao.ouvir(self._on_manutencao)
+
+    def recalcular(self):
+        self.por_dia_hora = Counter()
+        self._horarios = {}  # dia -> segundos do dia, ordenados
+        # Direto dos instantes da tabela, sem converter Data/Hora para texto por linha
+        por_dia = {}
+        for valor in self.producao.instantes():
+            if valor > IRREGULAR:
+                dia, segundos = divmod(valor, 86400)
+                por_dia.setdefault(dia, []).append(segundos)
+        for dia, horarios in por_dia.items():
+            texto = texto_dia(dia)
+            self._horarios[texto] = horarios
+            self.por_dia_hora.update(Counter((texto, segundos // 3600) for segundos in horarios))
+        for horarios in self._horarios.values():
+            horarios.sort()
+        self._recalcular_manutencao()
+        self.versao += 1
+
+    def definir_liberacoes(self, liberacoes, permanencias=None):
+        # Rollup por dia de liberação: dia -> [liberações, soma das permanências, maior],
+        # o gravado (storage.dwell_summary) ou, sem ele, montado das `liberacoes`.
+        # As liberações (pares entrada/saída) só servem ao tempo parado em dias
+        # passados: basta passar as que saíram a partir do primeiro dia consultado.
+        self.permanencia_por_dia = {dia: list(valores) for dia, valores in (permanencias or {}).items()}
+        self._liberacoes = []  # (entrada, saída) em timestamp
+        for entrada, saida in liberacoes:
+            entrada, saida = _timestamp_texto(entrada), _timestamp_texto(saida)
+            if entrada is not None and saida is not None:
+                self._liberacoes.append((entrada, saida))
+                if permanencias is None:
+                    self._acumular(entrada, saida)
+        self.versao += 1
+
+    def _acumular(self, entrada, saida):
+        permanencia = max(0.0, saida - entrada)
+        dia = datetime.fromtimestamp(saida).strftime("%Y-%m-%d")
+        acumulado = self.permanencia_por_dia.setdefault(dia, [0, 0.0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += permanencia
+        acumulado[2] = max(acumulado[2], permanencia)
+
+    def _recalcular_manutencao(self):
+        instantes = [valor for valor in self.manutencao.instantes() if valor > IRREGULAR]
+        self.em_manutencao = len(instantes)
+        self.soma_entradas = sum(map(_timestamp, instantes))
+
+    def _adicionar(self, registro, delta):
+        valor = instante(registro["Data"], registro["Hora"])
+        if valor is None:
+            return
+        dia, segundos = str(registro["Data"]), valor % 86400
+        self.por_dia_hora[dia, segundos // 3600] += delta
+        if self.por_dia_hora[dia, segundos // 3600] <= 0:
+            del self.por_dia_hora[dia, segundos // 3600]
+        horarios = self._horarios.setdefault(dia, [])
+        if delta > 0:
+            bisect.insort(horarios, segundos)
+        else:
+            pos = bisect.bisect_left(horarios, segundos)
+            if pos < len(horarios) and horarios[pos] == segundos:
+                del horarios[pos]
+        if not horarios:
+            del self._horarios[dia]
+
+    def _on_producao(self, acao, id_, registro, anterior):
+        if acao == "carregar":
+            self.recalcular()
+            return
+        if acao == "inserir":
+            self._adicionar(registro, 1)
+        elif acao == "remover":
+            self._adicionar(registro, -1)
+        elif acao == "editar":
+            self._adicionar(anterior, -1)
+            self._adicionar(registro, 1)
+        self.versao += 1
+
+    def _on_manutencao(self, acao, id_, registro, anterior):
+        if acao == "carregar":
+            self._recalcular_manutencao()
+            self.versao += 1
+            return
+        entrada = _instante(registro)
+        saida = _instante(anterior) if acao == "editar" else entrada if acao == "remover" else None
+        if saida is not None:
+            self.em_manutencao -= 1
+            self.soma_entradas -= saida.timestamp()
+        if acao == "remover" and entrada is not None:
+            # Liberação: permanência da entrada até agora (o armazenamento grava a mesma)
+            liberacao = (entrada.timestamp(), datetime.now().timestamp())
+            self._liberacoes.append(liberacao)
+            self._acumular(*liberacao)
+        if acao in ("inserir", "editar") and entrada is not None:
+            self.em_manutencao += 1
+            self.soma_entradas += entrada.timestamp()
+        self.versao += 1
+
+    def por_hora(self, dia):
+        return [(hora, self.por_dia_hora.get((dia, hora), 0)) for hora in range(24)]
+
+    def por_turno(self, dia):
+        # Turnos que começam em `dia`: as horas depois da meia-noite do turno que
+        # vira o dia são do dia seguinte
+        seguinte = (date.fromisoformat(dia) + timedelta(days=1)).isoformat()
+        contagem = []
+        for nome, inicio, fim in TURNOS:
+            if inicio < fim:
+                horas = [(dia, hora) for hora in range(inicio, fim)]
+            else:
+                horas = [(dia, hora) for hora in range(inicio, 24)] + [(seguinte, hora) for hora in range(fim)]
+            contagem.append((nome, sum(self.por_dia_hora.get(chave, 0) for chave in horas)))
+        return contagem
+
+    def intervalo_medio(self, dia):
+        # Segundos entre séries consecutivas no dia; com os horários ordenados,
+        # a soma dos intervalos é o último menos o primeiro
+        horarios = self._horarios.get(dia, ())
+        return (horarios[-1] - horarios[0]) / (len(horarios) - 1) if len(horarios) > 1 else None
+
+    def permanencia_media(self, dia):
+        # Média da entrada à liberação das unidades liberadas em `dia`
+        liberacoes, soma, _ = self.permanencia_por_dia.get(dia, (0, 0.0, 0.0))
+        return soma / liberacoes if liberacoes else None
+
+    def permanencia_atual_media(self, momento=None):
+        # Tempo médio que as unidades em manutenção em `momento` (padrão: agora) estão paradas
+        if momento is None:
+            if not self.em_manutencao:
+                return None
+            return datetime.now().timestamp() - self.soma_entradas / self.em_manutencao
+        # Num momento passado: as que ainda estão em manutenção e já tinham entrado,
+        # mais as liberadas depois dele
+        referencia = momento.timestamp()
+        entradas = [_timestamp(valor) for valor in self.manutencao.instantes() if valor > IRREGULAR]
+        entradas = [entrada for entrada in entradas if entrada <= referencia]
+        entradas.extend(entrada for entrada, saida in self._liberacoes if entrada <= referencia < saida)
+        return referencia - sum(entradas) / len(entradas) if entradas else None
+
+    def resumo_dia(self, dia):
+        # Dados de produtividade no formato usado por report.build_report; para
+        # dias passados, o tempo parado é o do fim do dia
+        fim_do_dia = datetime.combine(date.fromisoformat(dia) + timedelta(days=1), datetime.min.time())
+        momento = None if fim_do_dia > datetime.now() else fim_do_dia
+        return {
+            "turnos": self.por_turno(dia),
+            "horas": [(f"{hora:02d}:00", unidades) for hora, unidades in self.por_hora(dia) if unidades],
+            "indicadores": [
+                ("Intervalo Médio entre Séries", formatar_duracao(self.intervalo_medio(dia))),
+                ("Permanência Média em Manutenção", formatar_duracao(self.permanencia_media(dia))),
+                ("Tempo Médio Parado (em manutenção)", formatar_duracao(self.permanencia_atual_media(momento))),
+            ],
+        }
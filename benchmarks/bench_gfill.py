@@ -0,0 +1,212 @@
+# Benchmark dos caminhos críticos do ProductionApp com históricos sintéticos.
+#
+# Uso (sem monitor, via Xvfb):
+#   xvfb-run python benchmarks/bench_gfill.py --tamanhos 1000 10000 100000 1000000
+#
+# Os resultados são gravados em JSON para comparação entre versões.
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+from datetime import date, datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import GFILL  # noqa: E402
+from storage import COLUNAS, Evento, SQLiteStorage  # noqa: E402
+
+UNIDADES_POR_DIA = 300
+
+
+def gerar_historico(pasta, linhas):
+    # producao.db com `linhas` unidades produzidas e 10% disso em manutenção
+    storage = SQLiteStorage(os.path.join(pasta, "producao.db"))
+    inicio = date.today() - timedelta(days=linhas // UNIDADES_POR_DIA)
+    eventos = []
+    for i in range(linhas):
+        dia = (inicio + timedelta(days=i // UNIDADES_POR_DIA)).isoformat()
+        hora = f"{6 + (i % UNIDADES_POR_DIA) * 16 // UNIDADES_POR_DIA:02d}:{i % 60:02d}:00"
+        ns = f"GF{i:08d}"
+        if i % 10 == 9:
+            registro = dict(zip(COLUNAS["Manutencao"], (ns, "Estoque", dia, hora)))
+            eventos.append(Evento("Manutencao", "inserir", ns, registro))
+        else:
+            registro = dict(zip(COLUNAS["Producao"], (ns, dia, hora)))
+            eventos.append(Evento("Producao", "inserir", ns, registro))
+    storage.apply(eventos)
+    storage.close()
+    return inicio
+
+
+def gerar_imagens(pasta):
+    # O relatório precisa do logo e da imagem da máquina no diretório de trabalho
+    from PIL import Image
+    for nome in ("logoall.jpg", "maquina.png"):
+        caminho = os.path.join(RAIZ, nome)
+        destino = os.path.join(pasta, nome)
+        if os.path.exists(caminho):
+            with open(caminho, "rb") as origem, open(destino, "wb") as copia:
+                copia.write(origem.read())
+        else:
+            Image.new("RGB", (400, 300), "#4a90e2").save(destino)
+
+
+def silenciar_dialogos(pasta):
+    for nome in ("showinfo", "showwarning", "showerror"):
+        setattr(GFILL.messagebox, nome, lambda *a, **k: None)
+    GFILL.messagebox.askokcancel = lambda *a, **k: True
+    GFILL.messagebox.askyesno = lambda *a, **k: True
+    contador = iter(range(10 ** 9))
+    GFILL.filedialog.asksaveasfilename = lambda defaultextension="", **k: os.path.join(
+        pasta, f"saida_{next(contador)}{defaultextension}"
+    )
+
+
+def cronometrar(funcao, repeticoes, preparar=None):
+    tempos = []
+    for i in range(repeticoes):
+        if preparar:
+            preparar(i)
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def medir(linhas, repeticoes):
+    pasta = tempfile.mkdtemp(prefix=f"bench_gfill_{linhas}_")
+    inicio_historico = gerar_historico(pasta, linhas)
+    gerar_imagens(pasta)
+    silenciar_dialogos(pasta)
+    os.chdir(pasta)
+
+    resultados = {}
+
+    def carregar():
+        app = GFILL.ProductionApp.__new__(GFILL.ProductionApp)
+        app.load_data()
+        app.persistencia.close()
+        app.storage.close()
+
+    resultados["load_data"] = cronometrar(carregar, repeticoes)
+
+    root = tk.Tk()
+    root.withdraw()
+    inicio = time.perf_counter()
+    app = GFILL.ProductionApp(root)
+    root.update()
+    resultados["__init__"] = [(time.perf_counter() - inicio) * 1000]
+    app.create_deferred_widgets()
+
+    def sincronizar():
+        # Inclui o redesenho agendado pelo RefreshScheduler, mesmo se adiado
+        app.atualizador.executar()
+        root.update_idletasks()
+
+    novos = iter(range(10 ** 9))
+
+    def preparar_producao(_):
+        app.entry_ns_producao.delete(0, tk.END)
+        app.entry_ns_producao.insert(0, f"BENCH{next(novos):08d}")
+
+    resultados["produzir"] = cronometrar(
+        lambda: (app.produzir(), sincronizar()), repeticoes, preparar_producao
+    )
+
+    manutencao = iter(f"GF{i:08d}" for i in range(linhas) if i % 10 != 9)
+
+    def preparar_manutencao(_):
+        app.entry_ns_manutencao.delete(0, tk.END)
+        app.entry_ns_manutencao.insert(0, next(manutencao))
+
+    resultados["registrar_manutencao"] = cronometrar(
+        lambda: (app.registrar_manutencao(), sincronizar()), repeticoes, preparar_manutencao
+    )
+
+    def salvar():
+        ns = f"SAVE{next(novos):08d}"
+        # Data na partição aberta: meses fechados recusam a gravação
+        agora = datetime.now()
+        app.registrar_evento("Producao", "inserir", ns, {"NS": ns, "Data": agora.strftime("%Y-%m-%d"),
+                                                          "Hora": agora.strftime("%H:%M:%S")})
+        app.save_data()
+        app.persistencia.flush()
+
+    resultados["save_data"] = cronometrar(salvar, repeticoes)
+    resultados["update_ui"] = cronometrar(lambda: (app.update_ui(), sincronizar()), repeticoes)
+
+    semana_inicio = inicio_historico + timedelta(days=max(0, linhas // UNIDADES_POR_DIA // 2))
+
+    def preparar_filtro(_):
+        app.entry_data_inicio.set_date(semana_inicio)
+        app.entry_data_fim.set_date(semana_inicio + timedelta(days=6))
+
+    resultados["filtrar_producao"] = cronometrar(
+        lambda: (app.filtrar_producao(), sincronizar()), repeticoes, preparar_filtro
+    )
+    prefixos = iter(f"GF{i:08d}"[:4 + i % 6] for i in range(10 ** 9))
+
+    def preparar_busca(_):
+        app.entry_busca.delete(0, tk.END)
+        app.entry_busca.insert(0, next(prefixos))
+
+    resultados["buscar_ns"] = cronometrar(app.buscar_ns, repeticoes, preparar_busca)
+    resultados["export_csv"] = cronometrar(
+        lambda: (app.export_csv(), app.exportacao._thread.join()), repeticoes
+    )
+
+    def limpar_relatorios(_):
+        # Sem alteração nos dados entre as repetições, todas seriam acertos no cache
+        app.relatorios = None
+
+    resultados["gerar_relatorio"] = cronometrar(app.gerar_relatorio, repeticoes, limpar_relatorios)
+    resultados["gerar_relatorio_cache"] = cronometrar(app.gerar_relatorio, repeticoes)
+
+    app.persistencia.close()
+    app.storage.close()
+    root.destroy()
+    os.chdir(RAIZ)
+
+    return [
+        {
+            "linhas": linhas,
+            "operacao": operacao,
+            "repeticoes": len(tempos),
+            "mediana_ms": statistics.median(tempos),
+            "min_ms": min(tempos),
+            "max_ms": max(tempos),
+        }
+        for operacao, tempos in resultados.items()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do Gestor de Produção.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default="bench_gfill.json")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for linhas in args.tamanhos:
+        for linha in medir(linhas, args.repeticoes):
+            resultados.append(linha)
+            print(f"{linha['linhas']:>8} {linha['operacao']:<22} {linha['mediana_ms']:10.2f} ms")
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump({
+            "gerado_em": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "resultados": resultados,
+        }, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import csv
+from datetime import datetime
+
+import pandas as pd
+
+from records import instante
+
+
+def _separador(file_path):
+    # Vírgula, ponto e vírgula (padrão do Excel em português) ou tabulação, pela
+    # primeira linha. Só esses são candidatos: numa coluna de NS o detector do
+    # pandas (sep=None) escolheria um caractere do próprio número de série.
+    with open(file_path, encoding="utf-8-sig", errors="replace", newline="") as f:
+        primeira = f.readline()
+    try:
+        return csv.Sniffer().sniff(primeira, delimiters=",;\t").delimiter
+    except csv.Error:
+        return ","  # uma coluna só
+
+
+def read_batch(file_path):
+    # CSV com coluna NS (e opcionalmente Data/Hora) ou texto com um NS por linha.
+    # O índice do lote é a linha do arquivo menos 1, como espera validate_batch.
+    sep = _separador(file_path)
+    lote = pd.read_csv(file_path, dtype=str, sep=sep, encoding="utf-8-sig", skip_blank_lines=True)
+    if "NS" in lote.columns:
+        lote.index = lote.index + 1  # a linha 1 é o cabeçalho
+        return lote
+    return pd.read_csv(file_path, dtype=str, sep=sep, encoding="utf-8-sig", header=None,
+                       usecols=[0], names=["NS"], skip_blank_lines=True)
+
+
+def validate_batch(lote, *tabelas, storage=None):
+    # Valida o lote inteiro de uma vez: vazios, repetidos dentro do lote, NS já
+    # existentes (consultados no índice hash das tabelas, O(1) por linha, e no
+    # armazenamento numa única consulta), Data/Hora fora do formato e datas em
+    # meses fechados
+    agora = datetime.now()
+    lote = lote.copy()
+    lote["NS"] = lote["NS"].fillna("").astype(str).str.strip()
+    if "Data" not in lote.columns:
+        lote["Data"] = agora.strftime("%Y-%m-%d")
+    if "Hora" not in lote.columns:
+        lote["Hora"] = agora.strftime("%H:%M:%S")
+    lote["Data"] = lote["Data"].fillna(agora.strftime("%Y-%m-%d")).astype(str).str.strip()
+    lote["Hora"] = lote["Hora"].fillna(agora.strftime("%H:%M:%S")).astype(str).str.strip()
+
+    vazio = lote["NS"] == ""
+    repetido = lote["NS"].duplicated() & ~vazio
+    gravados = storage.existing(lote.loc[~vazio, "NS"].unique()) if storage is not None else set()
+    existente = lote["NS"].map(lambda ns: ns in gravados or any(ns in tabela for tabela in tabelas)) & ~vazio
+    invalido = pd.Series([instante(data, hora) is None for data, hora in zip(lote["Data"], lote["Hora"])],
+                         index=lote.index) & ~vazio
+    fechado_ate = storage.fechado_ate if storage is not None else ""
+    fechado = (lote["Data"] < fechado_ate) & ~vazio
+
+    motivo = pd.Series("", index=lote.index)
+    motivo[fechado] = "data em mês fechado"
+    motivo[invalido] = "data/hora fora do formato (AAAA-MM-DD HH:MM:SS)"
+    motivo[existente] = "já registrado"
+    motivo[repetido] = "repetido no lote"
+    motivo[vazio] = "número de série vazio"
+
+    rejeitado = motivo != ""
+    aceitos = lote.loc[~rejeitado, ["NS", "Data", "Hora"]].to_dict("records")
+    rejeitados = list(zip(lote.index[rejeitado] + 1, lote.loc[rejeitado, "NS"], motivo[rejeitado]))
+    return aceitos, rejeitados
@@ -0,0 +1,109 @@
+import csv
+import gzip
+import os
+import threading
+
+from storage import COLUNAS
+
+FORMATOS = [
+    ("CSV", "*.csv"),
+    ("CSV compactado", "*.csv.gz"),
+    ("Parquet", "*.parquet"),
+]
+
+
+def export_paths(file_path):
+    # producao no caminho escolhido e manutenção ao lado, com sufixo
+    for extensao in (".csv.gz", ".parquet", ".csv"):
+        if file_path.endswith(extensao):
+            base = file_path[:-len(extensao)]
+            return {"Producao": file_path, "Manutencao": f"{base}_manutencao{extensao}"}
+    return {"Producao": file_path, "Manutencao": f"{file_path}_manutencao"}
+
+
+class _CsvWriter:
+    def __init__(self, file_path, colunas, compactado=False):
+        if compactado:
+            self._arquivo = gzip.open(file_path, "wt", newline="", encoding="utf-8")
+        else:
+            self._arquivo = open(file_path, "w", newline="", encoding="utf-8")
+        self._csv = csv.writer(self._arquivo)
+        self._csv.writerow(colunas)
+
+    def write(self, bloco):
+        self._csv.writerows(bloco)
+
+    def close(self):
+        self._arquivo.close()
+
+
+class _ParquetWriter:
+    def __init__(self, file_path, colunas):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("a exportação em Parquet requer o pacote pyarrow")
+        self._pa = pa
+        self._colunas = colunas
+        self._schema = pa.schema([(c, pa.string()) for c in colunas])
+        self._writer = pq.ParquetWriter(file_path, self._schema, compression="snappy")
+
+    def write(self, bloco):
+        valores = list(zip(*bloco))
+        self._writer.write_table(self._pa.table(
+            {c: [None if v is None else str(v) for v in col] for c, col in zip(self._colunas, valores)},
+            schema=self._schema,
+        ))
+
+    def close(self):
+        self._writer.close()
+
+
+def _writer(file_path, destino, colunas):
+    # O formato vem do nome final; os dados vão para `destino` até terminar
+    if file_path.endswith(".parquet"):
+        return _ParquetWriter(destino, colunas)
+    return _CsvWriter(destino, colunas, compactado=file_path.endswith(".gz"))
+
+
+class ExportJob:
+    # Exportação em segundo plano, bloco a bloco, com progresso consultável pela interface
+    def __init__(self, storage, file_path, filtro=None, tamanho=50_000):
+        self.storage = storage
+        self.caminhos = export_paths(file_path)
+        self.filtro = filtro or (None, None)
+        self.tamanho = tamanho
+        self.total = 0
+        self.escritas = 0
+        self.erro = None
+        self.concluido = False
+        self._thread = threading.Thread(target=self._run, name="gfill-exportacao", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def progresso(self):
+        return self.escritas / self.total if self.total else 1.0
+
+    def _run(self):
+        try:
+            self.total = sum(self.storage.count(tabela, *self.filtro) for tabela in self.caminhos)
+            for tabela, file_path in self.caminhos.items():
+                temporario = file_path + ".parcial"
+                writer = _writer(file_path, temporario, COLUNAS[tabela])
+                try:
+                    for bloco in self.storage.iter_chunks(tabela, *self.filtro, tamanho=self.tamanho):
+                        writer.write(bloco)
+                        self.escritas += len(bloco)
+                except BaseException:
+                    writer.close()
+                    os.remove(temporario)
+                    raise
+                writer.close()
+                os.replace(temporario, file_path)
+        except Exception as e:
+            self.erro = e
+        finally:
+            self.concluido = True
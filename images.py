@@ -0,0 +1,24 @@
+import functools
+import os
+
+
+def prepare_image(path, largura_mm, dpi=300):
+    # Decodifica a imagem já no tamanho em que é impressa (draft evita decodificar o JPEG inteiro)
+    from PIL import Image
+    with Image.open(path) as img:
+        largura_px = round(largura_mm / 25.4 * dpi)
+        img.draft("RGB", (largura_px, largura_px * img.height // img.width))
+        preparada = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+        preparada.thumbnail((largura_px, largura_px * 10))
+    return preparada
+
+
+@functools.lru_cache(maxsize=16)
+def _em_cache(path, mtime, largura_mm, dpi):
+    return prepare_image(path, largura_mm, dpi)
+
+
+def load_image(path, largura_mm, dpi=300):
+    # Imagem preparada uma vez por processo e reaproveitada entre documentos;
+    # trocar o arquivo invalida a entrada (mtime) e as antigas saem do cache limitado
+    return _em_cache(path, os.path.getmtime(path), largura_mm, dpi)
@@ -0,0 +1,113 @@
+import functools
+import json
+import logging
+import os
+import platform
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+
+class Profiler:
+    # Mede a latência de cada ação da interface e das fases dentro dela.
+    # O total de uma ação é a soma das fases, então diálogos modais abertos
+    # depois da última fase não entram na conta.
+    def __init__(self, janela=1000):
+        self.janela = janela
+        self.amostras = defaultdict(lambda: deque(maxlen=self.janela))
+        self.ultima = None  # (acao, total_ms, {fase: ms})
+        self.ouvintes = []
+        self._pilha = []
+        self._log = None
+
+    def configurar(self, log_path="logs/latencia.log", max_bytes=1_000_000, backups=5):
+        os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+        self._log = logging.getLogger("gfill.latencia")
+        self._log.setLevel(logging.INFO)
+        self._log.propagate = False
+        for handler in list(self._log.handlers):
+            self._log.removeHandler(handler)
+            handler.close()
+        handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._log.addHandler(handler)
+
+    def acao(self, nome, fase=None):
+        # Decorador de handler; se chamado dentro de outra ação, conta também
+        # como a fase `fase` (ou `nome`) dela
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def wrapper(*args, **kwargs):
+                contexto = {"fases": defaultdict(float), "marca": time.perf_counter()}
+                self._pilha.append(contexto)
+                try:
+                    return funcao(*args, **kwargs)
+                finally:
+                    self._pilha.pop()
+                    fases = dict(contexto["fases"])
+                    if fases:
+                        total = sum(fases.values())
+                        if self._pilha:
+                            self._pilha[-1]["fases"][fase or nome] += total
+                            self._pilha[-1]["marca"] = time.perf_counter()
+                        self._registrar(nome, total, fases)
+            return wrapper
+        return decorador
+
+    @contextmanager
+    def medir(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._pilha:
+                fim = time.perf_counter()
+                self._pilha[-1]["fases"][nome] += (fim - inicio) * 1000
+                self._pilha[-1]["marca"] = fim
+
+    def fase(self, nome):
+        # Decorador equivalente a `with profiler.medir(nome)`
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def wrapper(*args, **kwargs):
+                with self.medir(nome):
+                    return funcao(*args, **kwargs)
+            return wrapper
+        return decorador
+
+    def marcar(self, nome):
+        # Atribui a `nome` o tempo desde a última marca ou fase da ação atual
+        if self._pilha:
+            agora = time.perf_counter()
+            contexto = self._pilha[-1]
+            contexto["fases"][nome] += (agora - contexto["marca"]) * 1000
+            contexto["marca"] = agora
+
+    def _registrar(self, nome, total, fases):
+        self.amostras[nome].append(total)
+        for fase, ms in fases.items():
+            self.amostras[f"{nome}.{fase}"].append(ms)
+        self.ultima = (nome, total, fases)
+        if self._log:
+            self._log.info(json.dumps({
+                "ts": datetime.now().isoformat(timespec="milliseconds"),
+                "estacao": platform.node(),
+                "acao": nome,
+                "total_ms": round(total, 3),
+                "fases": {fase: round(ms, 3) for fase, ms in fases.items()},
+            }, ensure_ascii=False))
+        for callback in self.ouvintes:
+            callback(nome, total, fases)
+
+    def percentis(self, nome):
+        amostras = sorted(self.amostras.get(nome, ()))
+        if not amostras:
+            return None
+        def p(q):
+            return amostras[min(len(amostras) - 1, int(q * len(amostras)))]
+        return {"p50": p(0.50), "p95": p(0.95), "p99": p(0.99), "n": len(amostras)}
+
+
+profiler = Profiler()
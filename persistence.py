@@ -0,0 +1,93 @@
+import threading
+
+
+class PersistenceWorker:
+    # Grava os eventos numa thread separada, agrupando rajadas num único lote
+    PENDENTE = "pendente"
+    SALVO = "salvo"
+    FALHOU = "falhou"
+
+    def __init__(self, storage, atraso=0.5):
+        self.storage = storage
+        self.atraso = atraso
+        self.estado = self.SALVO
+        self.erro = None
+        self.recusados = []  # eventos que o armazenamento rejeitou (ex.: NS de outra estação)
+        self._fila = []
+        self._gravando = False
+        self._urgente = False
+        self._parar = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="gfill-persistencia", daemon=True)
+        self._thread.start()
+
+    def enviar(self, eventos):
+        with self._cond:
+            self._fila.extend(eventos)
+            self.estado = self.PENDENTE
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._fila or self._parar)
+                if not self._fila:
+                    return
+                # Espera um pouco para juntar os eventos que chegarem em seguida
+                self._cond.wait_for(lambda: self._urgente or self._parar, timeout=self.atraso)
+                lote, self._fila = self._fila, []
+                self._gravando = True
+                self._urgente = False
+
+            try:
+                recusados = self.storage.apply(lote)
+                erro = None
+            except Exception as e:
+                erro = e
+
+            with self._cond:
+                self._gravando = False
+                if erro is None:
+                    self.recusados.extend(recusados or [])
+                    self.erro = None
+                    if not self._fila:
+                        self.estado = self.SALVO
+                else:
+                    # Mantém o lote na frente da fila para nova tentativa
+                    self._fila[:0] = lote
+                    self.estado = self.FALHOU
+                    self.erro = erro
+                self._cond.notify_all()
+                if erro is not None and not self._parar:
+                    self._cond.wait_for(lambda: self._urgente or self._parar, timeout=self.atraso * 10)
+
+    def take_rejected(self):
+        with self._cond:
+            recusados, self.recusados = self.recusados, []
+        return recusados
+
+    def _ocioso(self):
+        return not self._fila and not self._gravando
+
+    def flush(self, timeout=None):
+        # Bloqueia até a fila esvaziar; retorna False se não foi possível gravar tudo
+        with self._cond:
+            if self._ocioso():
+                return True
+            self._urgente = True
+            self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: self._ocioso() or (self.estado == self.FALHOU and not self._gravando),
+                timeout,
+            )
+            return self._ocioso()
+
+    def close(self, timeout=None):
+        # Só encerra a thread se tudo foi gravado; senão ela continua tentando
+        if not self.flush(timeout):
+            return False
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return True
@@ -0,0 +1,585 @@
+import bisect
+import functools
+import itertools
+from array import array
+from collections import Counter
+from datetime import date, timedelta
+
+# Esquema em memória: Data e Hora formam um único instante em segundos desde
+# 1970 (int64), colunas categóricas guardam códigos de 16 bits e o resto fica
+# em listas. A conversão de/para o texto das planilhas ("AAAA-MM-DD",
+# "HH:MM:SS") acontece só na borda da tabela.
+INSTANTE = ("Data", "Hora")
+IRREGULAR = -(2 ** 62)  # Data/Hora fora do formato: códigos daqui para baixo
+
+_EPOCA = date(1970, 1, 1)
+_DIAS = {}  # "AAAA-MM-DD" -> dias desde 1970
+_HORAS = {}  # "HH:MM:SS" -> segundos do dia
+_TEXTO_DIAS = {}
+_TEXTO_HORAS = {}
+
+
+def _dia(texto):
+    dia = _DIAS.get(texto)
+    if dia is None:
+        if not isinstance(texto, str) or len(texto) != 10 or texto[4] != "-" or texto[7] != "-":
+            return None
+        try:
+            dia = (date.fromisoformat(texto) - _EPOCA).days
+        except ValueError:
+            return None
+        _DIAS[texto] = dia
+    return dia
+
+
+def _segundo(texto):
+    segundo = _HORAS.get(texto)
+    if segundo is None:
+        if not isinstance(texto, str) or len(texto) != 8 or texto[2] != ":" or texto[5] != ":":
+            return None
+        h, m, s = texto[:2], texto[3:5], texto[6:]
+        if not (h.isdigit() and m.isdigit() and s.isdigit()) or int(h) > 23 or int(m) > 59 or int(s) > 59:
+            return None
+        segundo = _HORAS[texto] = int(h) * 3600 + int(m) * 60 + int(s)
+    return segundo
+
+
+def instante(data, hora):
+    # Segundos desde 1970 para Data/Hora no formato das planilhas, ou None
+    dia = _dia(data)
+    segundo = _segundo(hora)
+    if dia is None or segundo is None:
+        return None
+    return dia * 86400 + segundo
+
+
+def texto_dia(dia):
+    texto = _TEXTO_DIAS.get(dia)
+    if texto is None:
+        texto = _TEXTO_DIAS[dia] = (_EPOCA + timedelta(days=dia)).isoformat()
+    return texto
+
+
+def texto_hora(segundo):
+    texto = _TEXTO_HORAS.get(segundo)
+    if texto is None:
+        texto = _TEXTO_HORAS[segundo] = f"{segundo // 3600:02d}:{segundo // 60 % 60:02d}:{segundo % 60:02d}"
+    return texto
+
+
+class _Lista:
+    # Coluna sem tipo definido: valores Python numa lista
+    def __init__(self, nomes):
+        self.nomes = nomes
+        self.valores = []
+
+    def carregar(self, colunas):
+        self.valores = colunas[0]
+
+    def anexar(self, valores):
+        self.valores.append(valores[0])
+
+    def ler(self, pos):
+        return (self.valores[pos],)
+
+    def escrever(self, pos, valores):
+        self.valores[pos] = valores[0]
+
+    def colunas(self):
+        return [self.valores]
+
+    def compactar(self, vivos):
+        self.valores = [self.valores[pos] for pos in vivos]
+
+
+class _Categoria:
+    # Poucos valores distintos (Status): um código de 16 bits por linha
+    def __init__(self, nomes):
+        self.nomes = nomes
+        self.categorias = []
+        self._codigos = {}
+        self.codigos = array("H")
+
+    def _codigo(self, valor):
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.categorias)
+            self.categorias.append(valor)
+        return codigo
+
+    def carregar(self, colunas):
+        self.codigos = array("H", map(self._codigo, colunas[0]))
+
+    def anexar(self, valores):
+        self.codigos.append(self._codigo(valores[0]))
+
+    def ler(self, pos):
+        return (self.categorias[self.codigos[pos]],)
+
+    def escrever(self, pos, valores):
+        self.codigos[pos] = self._codigo(valores[0])
+
+    def colunas(self):
+        categorias = self.categorias
+        return [[categorias[codigo] for codigo in self.codigos]]
+
+    def compactar(self, vivos):
+        self.codigos = array("H", (self.codigos[pos] for pos in vivos))
+
+
+class _Instante:
+    # Data e Hora num único int64; pares fora do formato ficam numa lista à parte,
+    # referenciados por códigos a partir de IRREGULAR, preservando o valor original
+    def __init__(self, nomes):
+        self.nomes = nomes
+        self.valores = array("q")
+        self.irregulares = []
+
+    def _codificar(self, data, hora):
+        valor = instante(data, hora)
+        if valor is None:
+            valor = IRREGULAR - len(self.irregulares)
+            self.irregulares.append((data, hora))
+        return valor
+
+    def _decodificar(self, valor):
+        if valor <= IRREGULAR:
+            return self.irregulares[IRREGULAR - valor]
+        dia, segundo = divmod(valor, 86400)
+        return texto_dia(dia), texto_hora(segundo)
+
+    def carregar(self, colunas):
+        # Um parse por valor distinto; as linhas só consultam os caches
+        datas, horas = colunas
+        for data in set(datas):
+            _dia(data)
+        for hora in set(horas):
+            _segundo(hora)
+        dias = list(map(_DIAS.get, datas))
+        segundos = list(map(_HORAS.get, horas))
+        if None in dias or None in segundos:
+            self.valores = array("q", map(self._codificar, datas, horas))
+        else:
+            self.valores = array("q", [dia * 86400 + segundo for dia, segundo in zip(dias, segundos)])
+
+    def anexar(self, valores):
+        self.valores.append(self._codificar(*valores))
+
+    def ler(self, pos):
+        return self._decodificar(self.valores[pos])
+
+    def escrever(self, pos, valores):
+        self.valores[pos] = self._codificar(*valores)
+
+    def colunas(self):
+        pares = list(map(self._decodificar, self.valores))
+        return [[par[0] for par in pares], [par[1] for par in pares]]
+
+    def compactar(self, vivos):
+        self.valores = array("q", (self.valores[pos] for pos in vivos))
+
+
+class RecordTable:
+    # Tabela em memória: colunas tipadas (append amortizado O(1)),
+    # índice hash pela chave e remoção por marcação (tombstone)
+    COMPACTAR_MINIMO = 1024
+
+    def __init__(self, colunas, chave="NS", categorias=()):
+        self.colunas = list(colunas)
+        self.chave = chave
+        self.categorias = tuple(categorias)
+        self.versao = 0
+        self._ouvintes = []
+        self._seq = itertools.count()
+        self._limpar()
+
+    def _limpar(self):
+        self._fisicas = []
+        com_instante = all(c in self.colunas for c in INSTANTE)
+        if com_instante:
+            self._fisicas.append(_Instante(INSTANTE))
+        for coluna in self.colunas:
+            if coluna in self.categorias:
+                self._fisicas.append(_Categoria((coluna,)))
+            elif not (com_instante and coluna in INSTANTE):
+                self._fisicas.append(_Lista((coluna,)))
+        onde = {nome: (i, j) for i, fisica in enumerate(self._fisicas) for j, nome in enumerate(fisica.nomes)}
+        self._ordem = [onde[c] for c in self.colunas]
+        self._fisica_chave = self._fisicas[onde[self.chave][0]]
+        self._ids = []
+        self._vivo = []
+        self._indice = {}
+        self._extras = {}  # chaves duplicadas vindas de planilhas antigas
+        self._removidos = 0
+        self._frame = None
+        self._posicoes = None  # posições vivas, para acesso por fatia
+
+    def carregar(self, linhas):
+        # Carga inicial coluna a coluna, sem montar um dicionário por linha
+        self._limpar()
+        linhas = list(linhas)
+        n = len(linhas)
+        brutas = {c: [linha[i] for linha in linhas] for i, c in enumerate(self.colunas)}
+        for fisica in self._fisicas:
+            fisica.carregar([brutas[nome] for nome in fisica.nomes])
+        self._ids = list(itertools.islice(self._seq, n))
+        self._vivo = [True] * n
+        chaves = brutas[self.chave]
+        self._indice = dict(zip(chaves, range(n)))
+        if len(self._indice) != n:
+            for pos, ns in enumerate(chaves):
+                if self._indice[ns] != pos:
+                    self._extras.setdefault(ns, []).append(pos)
+        self._mudou()
+        self._notificar("carregar", None, None)
+
+    def ouvir(self, callback):
+        # callback(acao, id, registro, anterior)
+        self._ouvintes.append(callback)
+
+    def _notificar(self, acao, id_, registro, anterior=None):
+        for callback in self._ouvintes:
+            callback(acao, id_, registro, anterior)
+
+    def _mudou(self):
+        self.versao += 1
+        self._frame = None
+
+    def _anexar(self, registro):
+        pos = len(self._ids)
+        for fisica in self._fisicas:
+            fisica.anexar(tuple(registro.get(nome) for nome in fisica.nomes))
+        id_ = next(self._seq)
+        self._ids.append(id_)
+        self._vivo.append(True)
+        if self._posicoes is not None:
+            self._posicoes.append(pos)
+        ns = registro.get(self.chave)
+        if ns in self._indice:
+            self._extras.setdefault(ns, []).append(self._indice[ns])
+        self._indice[ns] = pos
+        return id_
+
+    def _linha(self, pos):
+        partes = [fisica.ler(pos) for fisica in self._fisicas]
+        return tuple(partes[i][j] for i, j in self._ordem)
+
+    def _registro(self, pos):
+        return dict(zip(self.colunas, self._linha(pos)))
+
+    def __len__(self):
+        return len(self._ids) - self._removidos
+
+    def __contains__(self, ns):
+        return ns in self._indice
+
+    def get(self, ns):
+        pos = self._indice.get(ns)
+        return None if pos is None else self._registro(pos)
+
+    def posicao(self, ns):
+        # (ordem entre as linhas vivas, id) do registro, para localizar sua página
+        pos = self._indice.get(ns)
+        if pos is None:
+            return None
+        if self._posicoes is None:
+            self._posicoes = [p for p, vivo in enumerate(self._vivo) if vivo]
+        return bisect.bisect_left(self._posicoes, pos), self._ids[pos]
+
+    def inserir(self, registro):
+        id_ = self._anexar(registro)
+        self._mudou()
+        self._notificar("inserir", id_, registro)
+        return id_
+
+    def estender(self, registros):
+        # Inserção em lote: uma única mudança de versão para todas as linhas
+        ids = []
+        for registro in registros:
+            id_ = self._anexar(registro)
+            ids.append(id_)
+            self._notificar("inserir", id_, registro)
+        if ids:
+            self._mudou()
+        return ids
+
+    def remover(self, ns):
+        return self.remover_varios([ns])
+
+    def remover_varios(self, chaves):
+        # Remoção em lote: uma única mudança de versão e compactação no fim
+        removidos = []
+        for ns in chaves:
+            removidos.extend(self._marcar_removido(ns))
+        if removidos:
+            self._mudou()
+            self._compactar_se_preciso()
+        return removidos
+
+    def _marcar_removido(self, ns):
+        posicoes = self._extras.pop(ns, [])
+        if ns in self._indice:
+            posicoes.append(self._indice.pop(ns))
+        removidos = []
+        for pos in posicoes:
+            self._vivo[pos] = False
+            self._removidos += 1
+            if self._posicoes is not None:
+                del self._posicoes[bisect.bisect_left(self._posicoes, pos)]
+            registro = self._registro(pos)
+            removidos.append(registro)
+            self._notificar("remover", self._ids[pos], registro)
+        return removidos
+
+    def editar(self, ns, campos):
+        # Localiza pelo índice e aplica todos os campos de uma vez; nada é alterado
+        # se algum campo for desconhecido ou se a nova chave já existir
+        pos = self._indice.get(ns)
+        if pos is None:
+            return None
+        desconhecidos = set(campos) - set(self.colunas)
+        if desconhecidos:
+            raise KeyError(f"Colunas desconhecidas: {', '.join(sorted(desconhecidos))}")
+        novo_ns = campos.get(self.chave, ns)
+        if novo_ns != ns and novo_ns in self._indice:
+            raise ValueError(f"Número de série {novo_ns} já registrado")
+        anterior = self._registro(pos)
+        for fisica in self._fisicas:
+            if any(nome in campos for nome in fisica.nomes):
+                fisica.escrever(pos, tuple(campos.get(nome, anterior[nome]) for nome in fisica.nomes))
+        if novo_ns != ns:
+            del self._indice[ns]
+            self._indice[novo_ns] = pos
+        registro = self._registro(pos)
+        self._mudou()
+        self._notificar("editar", self._ids[pos], registro, anterior)
+        return registro
+
+    def _colunas(self):
+        # Todas as posições já no formato das planilhas, na ordem de self.colunas
+        decodificadas = [fisica.colunas() for fisica in self._fisicas]
+        return [decodificadas[i][j] for i, j in self._ordem]
+
+    def linhas(self):
+        # (id, tupla de valores) das linhas vivas, na ordem de inserção
+        linhas = zip(*self._colunas())
+        if not self._removidos:
+            yield from zip(self._ids, linhas)
+            return
+        for id_, linha, vivo in zip(self._ids, linhas, self._vivo):
+            if vivo:
+                yield id_, linha
+
+    def coluna(self, nome):
+        # Valores vivos de uma coluna, na ordem de inserção
+        valores = self._colunas()[self.colunas.index(nome)]
+        if not self._removidos:
+            return valores
+        return [v for v, vivo in zip(valores, self._vivo) if vivo]
+
+    def ids(self):
+        # ids das linhas vivas, em ordem crescente
+        if not self._removidos:
+            return self._ids
+        return [id_ for id_, vivo in zip(self._ids, self._vivo) if vivo]
+
+    def por_id(self, ids):
+        # (id, tupla de valores) para cada id ainda vivo; os ids crescem com a
+        # posição, então a busca é binária
+        linhas = []
+        for id_ in ids:
+            pos = bisect.bisect_left(self._ids, id_)
+            if pos < len(self._ids) and self._ids[pos] == id_ and self._vivo[pos]:
+                linhas.append((id_, self._linha(pos)))
+        return linhas
+
+    def instantes(self):
+        # Instantes (int64) das linhas vivas, sem passar pelo texto; valores
+        # menores ou iguais a IRREGULAR marcam Data/Hora fora do formato
+        valores = self._fisicas[0].valores if isinstance(self._fisicas[0], _Instante) else array("q")
+        if not self._removidos:
+            return valores
+        return array("q", (v for v, vivo in zip(valores, self._vivo) if vivo))
+
+    def por_dia(self):
+        # Linhas vivas por Data (texto), contadas sobre os instantes
+        if not isinstance(self._fisicas[0], _Instante):
+            return Counter(map(str, self.coluna("Data")))
+        irregulares = self._fisicas[0].irregulares
+        dias = Counter()
+        contagem = Counter()
+        for valor in self.instantes():
+            if valor > IRREGULAR:
+                dias[valor // 86400] += 1
+            else:
+                contagem[str(irregulares[IRREGULAR - valor][0])] += 1
+        contagem.update({texto_dia(dia): n for dia, n in dias.items()})
+        return contagem
+
+    def fatia(self, inicio, fim):
+        # Linhas vivas no intervalo [inicio, fim) sem percorrer a tabela inteira
+        if self._posicoes is None:
+            self._posicoes = [pos for pos, vivo in enumerate(self._vivo) if vivo]
+        return [(self._ids[pos], self._linha(pos)) for pos in self._posicoes[inicio:fim]]
+
+    def ultimo(self):
+        for pos in range(len(self._vivo) - 1, -1, -1):
+            if self._vivo[pos]:
+                return self._registro(pos)
+        return None
+
+    def _compactar_se_preciso(self):
+        if self._removidos < self.COMPACTAR_MINIMO or self._removidos * 2 < len(self._ids):
+            return
+        vivos = [pos for pos, vivo in enumerate(self._vivo) if vivo]
+        for fisica in self._fisicas:
+            fisica.compactar(vivos)
+        self._ids = [self._ids[pos] for pos in vivos]
+        self._vivo = [True] * len(vivos)
+        self._removidos = 0
+        self._posicoes = None
+        self._indice = {}
+        self._extras = {}
+        for pos, ns in enumerate(self._fisica_chave.valores):
+            if ns in self._indice:
+                self._extras.setdefault(ns, []).append(self._indice[ns])
+            self._indice[ns] = pos
+
+    def frame(self):
+        # DataFrame somente leitura no layout das planilhas (colunas de self.colunas,
+        # Data e Hora em texto), com as categorias como Categorical; reconstruído só após mudanças
+        if self._frame is None:
+            import pandas as pd
+            dados = {}
+            for nome, valores in zip(self.colunas, self._colunas()):
+                if self._removidos:
+                    valores = [v for v, vivo in zip(valores, self._vivo) if vivo]
+                dados[nome] = pd.Categorical(valores) if nome in self.categorias else valores
+            self._frame = pd.DataFrame(dados, columns=self.colunas)
+        return self._frame
+
+
+class DateIndex:
+    # Índice ordenado de (instante, id) sobre uma RecordTable, mantido pelos eventos;
+    # uma consulta por intervalo custa O(log n) e só a página exibida é convertida
+    # para texto
+    def __init__(self, tabela):
+        self.tabela = tabela
+        self._chaves = None  # construído na primeira consulta, fora da abertura
+        tabela.ouvir(self._on_evento)
+
+    def _construir(self):
+        # Ordena só os inteiros; a ordenação estável mantém os ids crescentes nos empates
+        instantes = self.tabela.instantes()
+        ids = self.tabela.ids()
+        ordem = sorted(range(len(ids)), key=instantes.__getitem__)
+        self._chaves = [(instantes[i], ids[i]) for i in ordem]
+
+    def _chave(self, id_, registro):
+        # Data/Hora fora do formato ficam antes de qualquer data válida
+        valor = instante(registro.get("Data"), registro.get("Hora"))
+        return (IRREGULAR if valor is None else valor, id_)
+
+    def _on_evento(self, acao, id_, registro, anterior):
+        if acao == "carregar":
+            self._chaves = None
+        if self._chaves is None:
+            return
+        if acao in ("remover", "editar"):
+            chave = self._chave(id_, anterior if acao == "editar" else registro)
+            pos = bisect.bisect_left(self._chaves, chave)
+            if pos < len(self._chaves) and self._chaves[pos] == chave:
+                del self._chaves[pos]
+        if acao in ("inserir", "editar"):
+            bisect.insort(self._chaves, self._chave(id_, registro))
+
+    def intervalo(self, inicio, fim):
+        # Datas no formato AAAA-MM-DD, ambos os extremos inclusivos
+        if self._chaves is None:
+            self._construir()
+        lo = bisect.bisect_left(self._chaves, (_dia(inicio) * 86400,))
+        hi = bisect.bisect_left(self._chaves, ((_dia(fim) + 1) * 86400,))
+        return Intervalo(self.tabela, self._chaves[lo:hi])
+
+
+class PrefixIndex:
+    # Chaves (NS) de várias RecordTables numa lista ordenada, mantida pelos eventos;
+    # a busca por prefixo é uma busca binária seguida da leitura dos primeiros resultados
+    def __init__(self, *tabelas):
+        self.tabelas = tabelas
+        self._chaves = None  # construído na primeira busca, fora da abertura
+        for tabela in tabelas:
+            tabela.ouvir(functools.partial(self._on_evento, tabela.chave))
+
+    def _construir(self):
+        self._chaves = sorted(str(ns) for tabela in self.tabelas for ns in tabela.coluna(tabela.chave))
+
+    def _on_evento(self, chave, acao, id_, registro, anterior):
+        if acao == "carregar":
+            self._chaves = None
+        if self._chaves is None:
+            return
+        if acao == "editar" and anterior[chave] == registro[chave]:
+            return
+        if acao in ("remover", "editar"):
+            ns = str((anterior if acao == "editar" else registro)[chave])
+            pos = bisect.bisect_left(self._chaves, ns)
+            if pos < len(self._chaves) and self._chaves[pos] == ns:
+                del self._chaves[pos]
+        if acao in ("inserir", "editar"):
+            bisect.insort(self._chaves, str(registro[chave]))
+
+    def _faixa(self, prefixo):
+        if self._chaves is None:
+            self._construir()
+        lo = bisect.bisect_left(self._chaves, prefixo)
+        # Nenhuma chave com o prefixo passa de prefixo + o maior caractere
+        hi = bisect.bisect_left(self._chaves, prefixo + "\U0010ffff", lo)
+        return lo, hi
+
+    def contar(self, prefixo):
+        lo, hi = self._faixa(prefixo)
+        return hi - lo
+
+    def buscar(self, prefixo, limite=20):
+        # Até `limite` chaves distintas com o prefixo, em ordem
+        lo, hi = self._faixa(prefixo)
+        encontradas = []
+        for ns in self._chaves[lo:min(hi, lo + limite * 4)]:
+            if not encontradas or encontradas[-1] != ns:
+                encontradas.append(ns)
+                if len(encontradas) >= limite:
+                    break
+        return encontradas
+
+
+class Intervalo:
+    # Resultado de uma consulta por data, com a mesma interface de fatia de RecordTable
+    def __init__(self, tabela, chaves):
+        self.tabela = tabela
+        self._chaves = chaves
+
+    def __len__(self):
+        return len(self._chaves)
+
+    def fatia(self, inicio, fim):
+        return self.tabela.por_id(chave[1] for chave in self._chaves[inicio:fim])
+
+
+class Concatenacao:
+    # Várias fontes paginadas lidas em sequência como uma só (arquivo + partição aberta)
+    def __init__(self, *partes):
+        self.partes = partes
+
+    def __len__(self):
+        return sum(len(parte) for parte in self.partes)
+
+    def fatia(self, inicio, fim):
+        linhas = []
+        for parte in self.partes:
+            tamanho = len(parte)
+            if inicio < tamanho and fim > 0:
+                linhas.extend(parte.fatia(max(0, inicio), min(fim, tamanho)))
+            inicio -= tamanho
+            fim -= tamanho
+        return linhas
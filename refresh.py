@@ -0,0 +1,52 @@
+import time
+
+from instrumentation import profiler
+
+
+class RefreshScheduler:
+    # Junta os pedidos de atualização da interface: cada vista marcada como suja
+    # é redesenhada uma única vez, quando o Tk fica ocioso. Se o último redesenho
+    # foi demorado, o próximo espera o mesmo tempo, para que digitação e scanner
+    # continuem sendo atendidos entre um redesenho e outro.
+    def __init__(self, root):
+        self.root = root
+        self.vistas = {}  # nome -> callback, redesenhadas na ordem de registro
+        self.sujas = set()
+        self._agendado = None
+        self._ultimo_fim = 0.0
+        self._ultima_duracao = 0.0
+
+    def registrar(self, nome, callback):
+        self.vistas[nome] = callback
+
+    def marcar(self, *nomes):
+        # Sem nomes, marca todas as vistas
+        self.sujas.update(nomes or self.vistas)
+        if self._agendado is None:
+            espera = self._ultimo_fim + self._ultima_duracao - time.perf_counter()
+            if espera > 0.001:
+                self._agendado = self.root.after(int(espera * 1000), self._quando_ocioso)
+            else:
+                self._agendado = self.root.after_idle(self.executar)
+
+    def _quando_ocioso(self):
+        self._agendado = self.root.after_idle(self.executar)
+
+    def executar(self):
+        # Redesenha agora as vistas sujas (também usado para forçar a atualização).
+        # Sem vistas sujas não há redesenho nem medição no log de latência.
+        if self._agendado is not None:
+            self.root.after_cancel(self._agendado)
+            self._agendado = None
+        sujas, self.sujas = self.sujas, set()
+        if sujas:
+            self._redesenhar(sujas)
+
+    @profiler.acao("atualizar_tela")
+    def _redesenhar(self, sujas):
+        inicio = time.perf_counter()
+        for nome, callback in self.vistas.items():
+            if nome in sujas:
+                callback()
+        self._ultimo_fim = time.perf_counter()
+        self._ultima_duracao = self._ultimo_fim - inicio
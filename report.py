@@ -0,0 +1,329 @@
+import argparse
+import functools
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+
+from matplotlib.figure import Figure
+from fpdf import FPDF, FPDF_VERSION  # Biblioteca para gerar PDFs (fpdf2)
+
+if int(FPDF_VERSION.split(".")[0]) < 2:
+    # PyFPDF 1.x não aceita imagens em memória e output() imprime o PDF em vez de devolvê-lo
+    raise ImportError(f"fpdf {FPDF_VERSION} não suportado: instale fpdf2 (ver requirements.txt)")
+
+from images import load_image
+
+LOGO_PATH = "logoall.jpg"
+MAQUINA_PATH = "maquina.png"
+
+class ReportPDF(FPDF):
+    # Moldura e rodapé desenhados em todas as páginas
+    def header(self):
+        self.set_line_width(0.5)
+        self.set_draw_color(0, 0, 0)
+        self.rect(5, 5, 200, 287)  # Moldura fina
+        self.set_line_width(0.1)
+
+    def footer(self):
+        self.set_y(-32)
+        self.set_font("Arial", 'I', 8)
+        self.set_text_color(150, 150, 150)
+        self.cell(0, 5, "Relatório gerado automaticamente pelo Sistema de Gestão de Produção", 0, 0, 'C')
+
+
+def render_table(pdf, colunas, larguras, linhas, altura=7, alinhamentos=None):
+    # Tabela com cabeçalho repetido a cada quebra de página
+    alinhamentos = alinhamentos or ['L'] * len(colunas)
+
+    def cabecalho():
+        pdf.set_font("Arial", 'B', 9)
+        pdf.set_fill_color(240, 240, 240)
+        for coluna, largura in zip(colunas, larguras):
+            pdf.cell(largura, altura, coluna, 1, 0, 'C', 1)
+        pdf.ln()
+        pdf.set_font("Arial", '', 9)  # Fonte menor
+
+    cabecalho()
+    for linha in linhas:
+        if pdf.get_y() + altura > pdf.page_break_trigger:
+            pdf.add_page()
+            cabecalho()
+        for valor, largura, alinhamento in zip(linha, larguras, alinhamentos):
+            pdf.cell(largura, altura, str(valor), 1, 0, alinhamento)
+        pdf.ln()
+
+
+def build_report(dia, resumo, producao_dia, serie, analise=None):
+    # dia: "AAAA-MM-DD"; resumo: [(indicador, valor)];
+    # producao_dia: [(NS, Data, Hora)]; serie: [(dia, unidades)] em ordem cronológica;
+    # analise: ThroughputAnalytics.resumo_dia(dia), opcional
+
+    # Configurações gerais do PDF
+    pdf = ReportPDF()
+    pdf.set_margins(15, 15, 15)  # Margens equilibradas
+    pdf.set_auto_page_break(True, margin=35)  # Espaço reservado para o rodapé
+    pdf.add_page()
+
+    # ---- CABEÇALHO ---- #
+    # Logo
+    pdf.image(load_image(LOGO_PATH, 25), x=20, y=12, w=25)
+
+    # Título principal
+    pdf.set_font("Arial", 'B', 18)
+    pdf.set_xy(0, 15)
+    pdf.cell(0, 10, "Report Diário", 0, 1, 'C')
+
+    # Data formatada
+    pdf.set_font("Arial", '', 10)
+    pdf.set_text_color(100, 100, 100)  # Cinza profissional
+    hoje = datetime.now().strftime("%d/%m/%Y")
+    referencia = datetime.strptime(dia, "%Y-%m-%d").strftime("%d/%m/%Y")
+    if referencia == hoje:
+        pdf.cell(0, 5, f"Emitido em: {hoje}", 0, 1, 'C')
+    else:
+        pdf.cell(0, 5, f"Referente a: {referencia} - Emitido em: {hoje}", 0, 1, 'C')
+    pdf.ln(8)
+
+    # ---- SEÇÃO DE RESUMO ---- #
+    y_resumo = pdf.get_y()
+
+    # Tabela de Resumo
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 8, "Resumo Operacional", 0, 1)
+
+    # Cabeçalho da tabela
+    pdf.set_fill_color(240, 240, 240)  # Fundo cinza claro
+    pdf.set_font("Arial", 'B', 10)
+    pdf.cell(80, 8, "Indicador", 1, 0, 'C', 1)
+    pdf.cell(40, 8, "Valor", 1, 1, 'C', 1)
+
+    # Dados da tabela
+    pdf.set_font("Arial", '', 10)
+    pdf.set_text_color(50, 50, 50)  # Cinza escuro
+    for indicador, valor in resumo:
+        pdf.cell(80, 8, indicador, 1, 0, 'L')
+        pdf.cell(40, 8, str(valor), 1, 1, 'C')
+
+    # ---- IMAGEM DA MÁQUINA ---- #
+    # Ao lado do resumo; o conteúdo seguinte começa abaixo da imagem
+    maquina = load_image(MAQUINA_PATH, 41)
+    altura_maquina = 41 * maquina.height / maquina.width
+    pdf.image(maquina, x=150, y=y_resumo, w=41)
+    pdf.set_y(max(pdf.get_y(), y_resumo + altura_maquina))
+
+    pdf.ln(10)
+
+    # ---- TABELA DE PRODUÇÃO ---- #
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 8, "Produção do Dia", 0, 1)
+    render_table(pdf, ["NS", "Data", "Hora"], [60, 50, 40], producao_dia,
+                 alinhamentos=['L', 'C', 'C'])
+
+    pdf.ln(12)
+
+    # ---- PRODUTIVIDADE ---- #
+    if analise:
+        if pdf.get_y() + 40 > pdf.page_break_trigger:
+            pdf.add_page()
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, 8, "Produtividade por Turno", 0, 1)
+        render_table(pdf, ["Turno", "Unidades"], [60, 40], analise["turnos"], alinhamentos=['L', 'C'])
+        pdf.ln(4)
+        render_table(pdf, ["Indicador", "Valor"], [80, 40], analise["indicadores"], alinhamentos=['L', 'C'])
+        if analise["horas"]:
+            pdf.ln(4)
+            render_table(pdf, ["Hora", "Unidades"], [30, 30], analise["horas"], alinhamentos=['C', 'C'])
+        pdf.ln(12)
+
+    # ---- GRÁFICO DE PRODUÇÃO ---- #
+    if serie:
+        if pdf.get_y() + 75 > pdf.page_break_trigger:
+            pdf.add_page()
+        # Inserção no PDF
+        pdf.set_font("Arial", 'B', 12)
+        pdf.cell(0, 8, "Desempenho de Produção", 0, 1)
+        pdf.image(render_chart(serie), x=20, y=pdf.get_y(), w=170)  # Gráfico alinhado
+
+    return pdf
+
+
+class ReportCache:
+    # PDFs prontos por chave (dia, versões dos dados); um dia sem alterações
+    # desde a última geração sai direto daqui. Compartilhado com a thread de pré-geração.
+    def __init__(self, maximo=16):
+        self.maximo = maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            pdf = self._itens.get(chave)
+            if pdf is not None:
+                self._itens.move_to_end(chave)
+            return pdf
+
+    def put(self, chave, pdf):
+        with self._lock:
+            self._itens[chave] = pdf
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maximo:
+                self._itens.popitem(last=False)
+
+
+def render_report(dia, resumo, producao_dia, serie, analise=None):
+    # PDF completo em bytes, pronto para cache e gravação
+    return bytes(build_report(dia, resumo, producao_dia, serie, analise).output())
+
+
+class ReportJob:
+    # Geração do relatório em segundo plano a partir de dados já copiados pela
+    # interface; o PDF vai para o cache e, se pedido, para `file_path`
+    def __init__(self, cache, chave, dados, file_path=None):
+        self.cache = cache
+        self.chave = chave
+        self.dados = dados
+        self.file_path = file_path
+        self.pdf = None
+        self.erro = None
+        self.concluido = False
+        self._thread = threading.Thread(target=self._run, name="gfill-relatorio", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self.pdf = self.cache.get(self.chave)
+            if self.pdf is None:
+                self.pdf = render_report(*self.dados)
+                self.cache.put(self.chave, self.pdf)
+            if self.file_path:
+                os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                temporario = self.file_path + ".parcial"
+                with open(temporario, "wb") as arquivo:
+                    arquivo.write(self.pdf)
+                os.replace(temporario, self.file_path)
+        except Exception as e:
+            self.erro = e
+        finally:
+            self.concluido = True
+
+
+def render_chart(serie):
+    # Uma série igual à anterior reaproveita o PNG já renderizado
+    return io.BytesIO(_grafico_png(tuple(tuple(item) for item in serie)))
+
+
+@functools.lru_cache(maxsize=8)
+def _grafico_png(serie):
+    # Figure sem pyplot: seguro fora da thread do Tk e em processos paralelos
+    dias, unidades = zip(*serie)
+    fig = Figure(figsize=(8, 3))  # Formato mais alongado
+    ax = fig.add_subplot(111)
+    ax.bar([datetime.strptime(d, "%Y-%m-%d") for d in dias], unidades, color='#4A90E2', width=0.8)
+    ax.set_xlabel('')
+    ax.set_ylabel('Unidades')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+
+    # PNG em memória, sem arquivo temporário no diretório de trabalho
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight', dpi=150)
+    return buffer.getvalue()
+
+
+def report_data(df_producao, df_manutencao, dia, liberacoes=()):
+    # Dados do relatório de um dia a partir das tabelas completas (uso fora da aplicação);
+    # liberacoes: pares (entrada, saída) de storage.releases()
+    datas_producao = df_producao["Data"].astype(str)
+    datas_manutencao = df_manutencao["Data"].astype(str)
+    ate_o_dia = df_producao[datas_producao <= dia]
+    resumo = [
+        ("Máquinas Hoje", int((datas_producao == dia).sum())),
+        ("Total Produção", len(ate_o_dia)),
+        ("Manutenções Hoje", int((datas_manutencao == dia).sum())),
+        ("Total Manutenções", int((datas_manutencao <= dia).sum()))
+    ]
+    producao_dia = list(
+        df_producao.loc[datas_producao == dia, ["NS", "Data", "Hora"]].itertuples(index=False, name=None)
+    )
+    serie = sorted(ate_o_dia["Data"].astype(str).value_counts().items())
+
+    from analytics import ThroughputAnalytics
+    from records import RecordTable
+    # O dia seguinte entra por causa do turno que vira a meia-noite
+    seguinte = (datetime.strptime(dia, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    producao = RecordTable(["NS", "Data", "Hora"])
+    producao.carregar(producao_dia + list(
+        df_producao.loc[datas_producao == seguinte, ["NS", "Data", "Hora"]].itertuples(index=False, name=None)
+    ))
+    manutencao = RecordTable(["NS", "Status", "Data", "Hora"], categorias=("Status",))
+    manutencao.carregar(df_manutencao[["NS", "Status", "Data", "Hora"]].astype(str).itertuples(index=False, name=None))
+    analise = ThroughputAnalytics(producao, manutencao, liberacoes).resumo_dia(dia)
+    return resumo, producao_dia, serie, analise
+
+
+_DADOS = {}  # cache por processo: fonte -> (df_producao, df_manutencao, liberacoes)
+
+
+def _carregar(fonte):
+    if fonte not in _DADOS:
+        import pandas as pd
+        from storage import COLUNAS, open_storage
+        storage = open_storage(fonte)
+        dados = storage.load()
+        liberacoes = storage.releases()
+        storage.close()
+        _DADOS[fonte] = tuple(
+            pd.DataFrame(dados[tabela], columns=COLUNAS[tabela])
+            for tabela in ("Producao", "Manutencao")
+        ) + (liberacoes,)
+    return _DADOS[fonte]
+
+
+def _gerar(tarefa):
+    fonte, dia, pasta_saida = tarefa
+    df_producao, df_manutencao, liberacoes = _carregar(fonte)
+    pdf = build_report(dia, *report_data(df_producao, df_manutencao, dia, liberacoes))
+    planta = os.path.splitext(os.path.basename(fonte))[0]
+    file_path = os.path.join(pasta_saida, f"relatorio_{planta}_{dia}.pdf")
+    pdf.output(file_path)
+    return file_path
+
+
+def generate_reports(fontes, dias, pasta_saida, workers=None):
+    os.makedirs(pasta_saida, exist_ok=True)
+    tarefas = [(fonte, dia, pasta_saida) for fonte in fontes for dia in dias]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_gerar, tarefas, chunksize=max(1, len(tarefas) // 32)))
+
+
+def dias_entre(inicio, fim):
+    atual = date.fromisoformat(inicio)
+    final = date.fromisoformat(fim)
+    while atual <= final:
+        yield atual.isoformat()
+        atual += timedelta(days=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera relatórios diários de produção sem a interface gráfica.")
+    parser.add_argument("dados", nargs="+", help="arquivos de dados (producao.db ou .xlsx), um por planta")
+    parser.add_argument("--inicio", default=date.today().isoformat(), help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument("--fim", help="último dia (AAAA-MM-DD); padrão: igual ao início")
+    parser.add_argument("--saida", default="relatorios", help="pasta de destino dos PDFs")
+    parser.add_argument("--workers", type=int, help="número de processos (padrão: núcleos da CPU)")
+    args = parser.parse_args(argv)
+
+    dias = list(dias_entre(args.inicio, args.fim or args.inicio))
+    for file_path in generate_reports(args.dados, dias, args.saida, args.workers):
+        print(file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,136 @@
+import argparse
+import json
+import os
+import sys
 import tkinter as tk
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from tkinter import filedialog, messagebox
 from PIL import Image, ImageTk
-from fpdf import FPDF
+from fpdf import FPDF, FPDF_VERSION
+
+if int(FPDF_VERSION.split(".")[0]) < 2:
+    # PyFPDF 1.x não aceita imagens PIL e output() imprime o PDF em vez de devolvê-lo
+    raise ImportError(f"fpdf {FPDF_VERSION} não suportado: instale fpdf2 (ver requirements.txt)")
+
+from images import load_image
+
+def _latin1(texto):
+    return texto.encode('latin-1', 'ignore').decode('latin-1')
+
+
+def load_logo(path):
+    # Logo na largura da página, pelo cache de imagens compartilhado com os relatórios
+    return load_image(path, 210)
+
+
+def preview_logo(path, tamanho=(600, 150)):
+    # Miniatura para a tela: draft/reduce reduzem a imagem antes do filtro final
+    with Image.open(path) as img:
+        img.draft("RGB", tamanho)
+        return img.resize(tamanho, reducing_gap=2.0)
+
+
+def build_resume(nome, secoes, logo=None):
+    # secoes: [(titulo, conteudo)]; logo: imagem PIL já preparada (ver load_logo)
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.add_page()
+
+    if logo is not None:
+        pdf.image(logo, x=0, y=0, w=210)
+        pdf.ln(38)
+
+    pdf.set_font("Arial", style='B', size=25)
+    pdf.cell(200, 10, _latin1(nome), ln=True, align='C')
+    pdf.ln(10)
+
+    for title, content in secoes:
+        title = str(title).strip()
+        content = str(content).strip()
+        if title and content:
+            pdf.set_font("Arial", style='B', size=12)
+            pdf.cell(200, 8, _latin1(title), ln=True)
+            pdf.ln(1)  # Adiciona um pequeno espaço entre título e descrição
+            pdf.set_font("Arial", size=12)
+            pdf.multi_cell(0, 6, _latin1(content), align='J')
+            pdf.ln(4)  # Espaçamento reduzido entre seções
+    return pdf
+
+
+def render_resume(nome, secoes, logo_path=None):
+    # PDF pronto em memória, para embutir a geração em outras ferramentas
+    logo = load_logo(logo_path) if logo_path else None
+    return bytes(build_resume(nome, secoes, logo).output())
+
+
+def read_candidates(file_path):
+    # CSV/XLSX: uma linha por candidato, coluna "Nome" e uma coluna por seção.
+    # JSON: lista de objetos no mesmo formato, ou com "nome" e "secoes" [{"titulo", "conteudo"}].
+    if file_path.lower().endswith(".json"):
+        with open(file_path, encoding="utf-8") as f:
+            registros = json.load(f)
+    else:
+        import pandas as pd
+        if file_path.lower().endswith((".xlsx", ".xls")):
+            frame = pd.read_excel(file_path, dtype=str)
+        else:
+            frame = pd.read_csv(file_path, dtype=str, sep=None, engine="python")
+        registros = frame.fillna("").to_dict("records")
+
+    candidatos = []
+    for registro in registros:
+        campos = {str(k).strip().lower(): k for k in registro}
+        chave_nome = campos.get("nome", campos.get("name"))
+        nome = str(registro.get(chave_nome) or "").strip() if chave_nome else ""
+        if "secoes" in campos:
+            secoes = [(s.get("titulo", ""), s.get("conteudo", "")) for s in registro[campos["secoes"]]]
+        else:
+            secoes = [(k, v) for k, v in registro.items() if k != chave_nome and v is not None]
+        if nome:
+            candidatos.append((nome, secoes))
+    return candidatos
+
+
+def _slug(nome):
+    texto = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode("ascii")
+    return "_".join("".join(c if c.isalnum() else " " for c in texto).split()).lower() or "candidato"
+
+
+def output_paths(nomes, pasta_saida):
+    # Um caminho por candidato, sem repetir nomes do lote nem sobrescrever arquivos existentes
+    usados = set()
+    caminhos = []
+    for nome in nomes:
+        base = os.path.join(pasta_saida, f"curriculo_{_slug(nome)}")
+        file_path, n = f"{base}.pdf", 1
+        while file_path in usados or os.path.exists(file_path):
+            n += 1
+            file_path = f"{base}_{n}.pdf"
+        usados.add(file_path)
+        caminhos.append(file_path)
+    return caminhos
+
+
+def _iniciar_worker(logo_path):
+    if logo_path:
+        load_logo(logo_path)
+
+
+def _gerar(tarefa):
+    nome, secoes, logo_path, file_path = tarefa
+    with open(file_path, "wb") as f:
+        f.write(render_resume(nome, secoes, logo_path))
+    return file_path
+
+
+def generate_resumes(candidatos, pasta_saida, logo_path=None, workers=None):
+    os.makedirs(pasta_saida, exist_ok=True)
+    caminhos = output_paths([nome for nome, _ in candidatos], pasta_saida)
+    tarefas = [(nome, secoes, logo_path, file_path) for (nome, secoes), file_path in zip(candidatos, caminhos)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=(logo_path,)) as executor:
+        return list(executor.map(_gerar, tarefas, chunksize=max(1, len(tarefas) // 32)))
+
 
 class ResumeApp:
     def __init__(self, root):
@@ -36,14 +165,15 @@ class ResumeApp:
         
         self.generate_btn = tk.Button(self.root, text="Gerar Currículo", command=self.generate_resume)
         self.generate_btn.pack()
+
+        self.batch_btn = tk.Button(self.root, text="Gerar em Lote", command=self.generate_batch)
+        self.batch_btn.pack()
     
     def add_logo(self):
         file_path = filedialog.askopenfilename(filetypes=[("Imagens", "*.png;*.jpg;*.jpeg")])
         if file_path:
             self.logo_path = file_path
-            img = Image.open(file_path)
-            img = img.resize((600, 150))
-            self.logo_img = ImageTk.PhotoImage(img)
+            self.logo_img = ImageTk.PhotoImage(preview_logo(file_path))
             self.logo_label.config(image=self.logo_img)
     
     def add_field(self):
@@ -61,33 +191,47 @@ class ResumeApp:
         self.entries.append((title_entry, content_entry))
     
     def generate_resume(self):
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.add_page()
-        
-        if self.logo_path:
-            pdf.image(self.logo_path, x=0, y=0, w=210)
-            pdf.ln(38)
-        
-        pdf.set_font("Arial", style='B', size=25)
-        pdf.cell(200, 10, self.candidate_name.get().encode('latin-1', 'ignore').decode('latin-1'), ln=True, align='C')
-        pdf.ln(10)
-        
-        for title_entry, content_entry in self.entries:
-            title = title_entry.get().strip()
-            content = content_entry.get("1.0", tk.END).strip()
-            if title and content:
-                pdf.set_font("Arial", style='B', size=12)
-                pdf.cell(200, 8, title.encode('latin-1', 'ignore').decode('latin-1'), ln=True)
-                pdf.ln(1)  # Adiciona um pequeno espaço entre título e descrição
-                pdf.set_font("Arial", size=12)
-                pdf.multi_cell(0, 6, content.encode('latin-1', 'ignore').decode('latin-1'), align='J')
-                pdf.ln(4)  # Espaçamento reduzido entre seções
-        
-        pdf.output("curriculo.pdf", "F")
+        secoes = [(title_entry.get(), content_entry.get("1.0", tk.END)) for title_entry, content_entry in self.entries]
+        with open("curriculo.pdf", "wb") as f:
+            f.write(render_resume(self.candidate_name.get(), secoes, self.logo_path))
         messagebox.showinfo("Sucesso", "Currículo gerado com sucesso! Verifique o arquivo curriculo.pdf.")
-        
+
+    def generate_batch(self):
+        file_path = filedialog.askopenfilename(filetypes=[("Candidatos", "*.csv;*.xlsx;*.json")])
+        if not file_path:
+            return
+        pasta_saida = filedialog.askdirectory(title="Pasta de destino")
+        if not pasta_saida:
+            return
+        try:
+            candidatos = read_candidates(file_path)
+            self.root.config(cursor="watch")
+            self.root.update_idletasks()
+            gerados = generate_resumes(candidatos, pasta_saida, self.logo_path)
+        except Exception as e:
+            messagebox.showerror("Erro", f"Erro ao gerar currículos: {str(e)}")
+            return
+        finally:
+            self.root.config(cursor="")
+        messagebox.showinfo("Sucesso", f"{len(gerados)} currículo(s) gerado(s) em {pasta_saida}.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um currículo em PDF por candidato, sem a interface gráfica.")
+    parser.add_argument("candidatos", help="planilha de candidatos (.csv, .xlsx ou .json)")
+    parser.add_argument("--logo", help="imagem do cabeçalho")
+    parser.add_argument("--saida", default="curriculos", help="pasta de destino dos PDFs")
+    parser.add_argument("--workers", type=int, help="número de processos (padrão: núcleos da CPU)")
+    args = parser.parse_args(argv)
+
+    for file_path in generate_resumes(read_candidates(args.candidatos), args.saida, args.logo, args.workers):
+        print(file_path)
+
+
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = ResumeApp(root)
-    root.mainloop()
+    if len(sys.argv) > 1:
+        main()
+    else:
+        root = tk.Tk()
+        app = ResumeApp(root)
+        root.mainloop()
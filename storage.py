@@ -0,0 +1,718 @@
+import datetime
+import json
+import os
+import pathlib
+import platform
+import sqlite3
+import threading
+import uuid
+from collections import Counter, namedtuple
+
+COLUNAS = {
+    "Producao": ["NS", "Data", "Hora"],
+    "Manutencao": ["NS", "Status", "Data", "Hora"],
+}
+
+# Um evento corresponde a uma única escrita pequena no armazenamento
+# acao: "inserir" | "remover" | "editar"
+Evento = namedtuple("Evento", ["tabela", "acao", "ns", "registro"])
+
+
+# Permanência de cada liberação em segundos, agrupada pelo dia da saída;
+# `{}` filtra as liberações (entrada/hora fora do formato ficam de fora)
+_PERMANENCIAS = (
+    "SELECT substr(saida, 1, 10), COUNT(*), SUM(permanencia), MAX(permanencia) FROM ("
+    "SELECT saida, MAX(0, strftime('%s', saida) - strftime('%s', entrada)) AS permanencia "
+    "FROM liberacoes WHERE {}) WHERE permanencia IS NOT NULL GROUP BY 1"
+)
+
+
+class ExcelStorage:
+    # Backend legado: mantém uma cópia das planilhas e reescreve o arquivo inteiro.
+    # Não tem partições: todo o histórico fica em memória. Na aplicação serve só à
+    # migração única para o SQLite, que na abertura lê apenas a partição aberta.
+    fechado_ate = ""
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._lock = threading.RLock()
+        self._frames = None
+        self._linhas = None
+
+    def load(self, desde=None):
+        with self._lock:
+            if not os.path.exists(self.file_name):
+                self._linhas = {tabela: [] for tabela in COLUNAS}
+                return self._linhas
+            import pandas as pd
+            # Uma única leitura do arquivo para as duas planilhas
+            planilhas = pd.read_excel(self.file_name, sheet_name=list(COLUNAS))
+            linhas = {
+                tabela: [tuple(_texto(v) for v in linha)
+                         for linha in df[COLUNAS[tabela]].itertuples(index=False, name=None)]
+                for tabela, df in planilhas.items()
+            }
+            self._linhas = linhas
+            return linhas
+
+    def _frames_carregados(self):
+        # DataFrames só são montados na primeira gravação
+        if self._frames is None:
+            import pandas as pd
+            if self._linhas is None:
+                self.load()
+            self._frames = {
+                tabela: pd.DataFrame(self._linhas[tabela], columns=COLUNAS[tabela])
+                for tabela in COLUNAS
+            }
+            self._linhas = None
+        return self._frames
+
+    def apply(self, eventos):
+        with self._lock:
+            self._apply(eventos)
+        return []
+
+    def _apply(self, eventos):
+        import pandas as pd
+        self._frames_carregados()
+        for evento in eventos:
+            df = self._frames[evento.tabela]
+            if evento.acao == "inserir":
+                novo = pd.DataFrame([evento.registro], columns=COLUNAS[evento.tabela])
+                df = pd.concat([df, novo], ignore_index=True)
+            elif evento.acao == "remover":
+                df = df[df["NS"] != evento.ns]
+            elif evento.acao == "editar":
+                mascara = df["NS"] == evento.ns
+                for coluna, valor in evento.registro.items():
+                    df.loc[mascara, coluna] = valor
+            self._frames[evento.tabela] = df
+        self.export_xlsx(self.file_name)
+
+    def export_xlsx(self, path):
+        import pandas as pd
+        with self._lock, pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+            for tabela, df in self._frames_carregados().items():
+                df.to_excel(writer, sheet_name=tabela, index=False)
+
+    def changes_since(self):
+        # Planilha de uma única estação: não há alterações externas
+        return [], True
+
+    def __contains__(self, ns):
+        return False
+
+    def existing(self, serials):
+        return set()
+
+    def close_partitions(self, inicio_aberta):
+        pass
+
+    def archive_summary(self):
+        return {"producao_por_dia": Counter(), "total": 0, "ultimo_ns": None}
+
+    def find_archived(self, ns):
+        return None
+
+    def find_archived_prefix(self, prefixo, limite=20):
+        return []
+
+    def archived_position(self, ns):
+        return None
+
+    def released_among(self, serials):
+        return set()
+
+    def history(self, ns):
+        return []
+
+    def releases(self, desde=None):
+        return []
+
+    def dwell_summary(self):
+        return {}
+
+    def range_view(self, inicio, fim, ate=None):
+        return _ListaVazia()
+
+    def count(self, tabela, inicio=None, fim=None):
+        return sum(len(bloco) for bloco in self.iter_chunks(tabela, inicio, fim))
+
+    def iter_chunks(self, tabela, inicio=None, fim=None, tamanho=50_000):
+        with self._lock:
+            if self._frames is not None:
+                linhas = list(self._frames[tabela].itertuples(index=False, name=None))
+            else:
+                linhas = (self._linhas or self.load())[tabela]
+        data = COLUNAS[tabela].index("Data")
+        if inicio and fim:
+            linhas = [linha for linha in linhas if inicio <= str(linha[data]) <= fim]
+        for i in range(0, len(linhas), tamanho):
+            yield linhas[i:i + tamanho]
+
+    def close(self):
+        pass
+
+
+class SQLiteStorage:
+    # Backend de journal: cada evento vira um INSERT/DELETE/UPDATE de uma linha.
+    # Em modo WAL várias estações podem abrir o mesmo arquivo; a tabela `eventos`
+    # registra cada alteração para que as outras estações a incorporem.
+    TABELAS = {
+        "Producao": ("producao", ["ns", "data", "hora"]),
+        "Manutencao": ("manutencao", ["ns", "status", "data", "hora"]),
+    }
+    EVENTOS_MANTIDOS = 100_000
+
+    def __init__(self, file_name, estacao=None):
+        self.file_name = file_name
+        self.estacao = estacao or f"{platform.node()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.ultimo_evento = 0
+        # A conexão é usada pela thread de persistência; o lock serializa o acesso.
+        # Transações são abertas explicitamente (BEGIN IMMEDIATE) em apply.
+        self.conn = sqlite3.connect(file_name, check_same_thread=False,
+                                    isolation_level=None, timeout=10)
+        self._lock = threading.RLock()
+        self._conn_busca = None
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS producao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ns TEXT NOT NULL,
+                data TEXT,
+                hora TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_producao_ns ON producao(ns);
+            CREATE INDEX IF NOT EXISTS idx_producao_data ON producao(data);
+            CREATE TABLE IF NOT EXISTS manutencao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ns TEXT NOT NULL,
+                status TEXT,
+                data TEXT,
+                hora TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_manutencao_ns ON manutencao(ns);
+            CREATE INDEX IF NOT EXISTS idx_manutencao_data ON manutencao(data);
+            CREATE TABLE IF NOT EXISTS particoes (
+                mes TEXT PRIMARY KEY,
+                producao_por_dia TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+            CREATE TABLE IF NOT EXISTS auditoria (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                momento TEXT NOT NULL,
+                estacao TEXT NOT NULL,
+                tabela TEXT NOT NULL,
+                ns TEXT NOT NULL,
+                ns_novo TEXT NOT NULL,
+                alteracoes TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_auditoria_ns ON auditoria(ns);
+            CREATE INDEX IF NOT EXISTS idx_auditoria_ns_novo ON auditoria(ns_novo);
+            CREATE TABLE IF NOT EXISTS liberacoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ns TEXT NOT NULL,
+                entrada TEXT NOT NULL,
+                saida TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_liberacoes_ns ON liberacoes(ns);
+            CREATE INDEX IF NOT EXISTS idx_liberacoes_saida ON liberacoes(saida);
+            CREATE TABLE IF NOT EXISTS permanencias (
+                dia TEXT PRIMARY KEY,
+                liberacoes INTEGER NOT NULL,
+                soma REAL NOT NULL,
+                maior REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS eventos (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                estacao TEXT NOT NULL,
+                tabela TEXT NOT NULL,
+                acao TEXT NOT NULL,
+                ns TEXT NOT NULL,
+                registro TEXT
+            );
+        """)
+        # Bancos anteriores ao rollup de permanência: montado uma vez das liberações
+        self.conn.execute(
+            "INSERT INTO permanencias (dia, liberacoes, soma, maior) "
+            + _PERMANENCIAS.format("NOT EXISTS (SELECT 1 FROM permanencias)")
+        )
+        # Produção com data anterior a `fechado_ate` pertence a meses fechados
+        self._ler_fechado_ate()
+
+    def _ler_fechado_ate(self):
+        # Outra estação pode ter fechado meses depois da abertura: relido a cada transação de escrita
+        linha = self.conn.execute("SELECT valor FROM meta WHERE chave = 'fechado_ate'").fetchone()
+        self.fechado_ate = linha[0] if linha else ""
+
+    def load(self, desde=None):
+        # `desde`: carrega só a produção a partir dessa data (partição aberta).
+        # Nunca abaixo de `fechado_ate`, relido aqui: outra estação pode ter fechado
+        # meses, e essas linhas passam a vir só dos agregados e de range_view.
+        with self._lock:
+            # Uma transação de leitura: tabelas, limite e posição do journal do mesmo instante
+            self.conn.execute("BEGIN")
+            try:
+                self._ler_fechado_ate()
+                if desde is not None:
+                    desde = max(desde, self.fechado_ate)
+                dados = self._ler_tabelas(desde)
+                self.ultimo_evento = self.conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM eventos"
+                ).fetchone()[0]
+            finally:
+                self.conn.execute("COMMIT")
+        return dados
+
+    def _ler_tabelas(self, desde=None):
+        dados = {}
+        for tabela, (nome, colunas) in self.TABELAS.items():
+            if desde and tabela == "Producao":
+                cursor = self.conn.execute(
+                    f"SELECT {', '.join(colunas)} FROM {nome} "
+                    f"WHERE data >= ? OR data IS NULL ORDER BY id", (desde,)
+                )
+            else:
+                cursor = self.conn.execute(
+                    f"SELECT {', '.join(colunas)} FROM {nome} ORDER BY id"
+                )
+            dados[tabela] = cursor.fetchall()
+        return dados
+
+    def apply(self, eventos):
+        # Retorna os eventos recusados (NS duplicado), que não foram gravados
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._ler_fechado_ate()
+                recusados = self._gravar(eventos, verificar=True)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return recusados
+
+    def _existe(self, ns, *tabelas):
+        return any(
+            self.conn.execute(f"SELECT 1 FROM {self.TABELAS[t][0]} WHERE ns = ? LIMIT 1", (ns,)).fetchone()
+            for t in tabelas
+        )
+
+    def _gravar(self, eventos, verificar):
+        recusados = []
+        for evento in eventos:
+            nome, colunas = self.TABELAS[evento.tabela]
+            arquivada = verificar and evento.tabela == "Producao" and self._data_arquivada(evento)
+            if evento.acao == "inserir":
+                if verificar and (arquivada or self._existe(evento.ns, *self.TABELAS)):
+                    recusados.append(evento)
+                    continue
+                valores = [_texto(evento.registro.get(c)) for c in COLUNAS[evento.tabela]]
+                self.conn.execute(
+                    f"INSERT INTO {nome} ({', '.join(colunas)}) "
+                    f"VALUES ({', '.join('?' * len(colunas))})",
+                    valores,
+                )
+            elif evento.acao == "remover":
+                if verificar and evento.tabela == "Manutencao":
+                    self._registrar_liberacao(evento.ns)
+                if arquivada:
+                    # Unidade de um mês fechado saindo da produção (ida para manutenção)
+                    for (data,) in self.conn.execute(
+                        "SELECT data FROM producao WHERE ns = ? AND data < ?", (evento.ns, self.fechado_ate)
+                    ).fetchall():
+                        self._ajustar_particao(data, -1)
+                self.conn.execute(f"DELETE FROM {nome} WHERE ns = ?", (evento.ns,))
+            elif evento.acao == "editar":
+                novo_ns = evento.registro.get("NS", evento.ns)
+                if verificar and (arquivada or novo_ns != evento.ns and self._existe(novo_ns, *self.TABELAS)):
+                    recusados.append(evento)
+                    continue
+                campos = [(colunas[COLUNAS[evento.tabela].index(c)], _texto(v))
+                          for c, v in evento.registro.items()]
+                if verificar:
+                    self._auditar(evento, nome, campos)
+                self.conn.execute(
+                    f"UPDATE {nome} SET {', '.join(c + ' = ?' for c, _ in campos)} "
+                    f"WHERE ns = ?",
+                    [v for _, v in campos] + [evento.ns],
+                )
+            if verificar:
+                self.conn.execute(
+                    "INSERT INTO eventos (estacao, tabela, acao, ns, registro) VALUES (?, ?, ?, ?, ?)",
+                    (self.estacao, evento.tabela, evento.acao, evento.ns,
+                     json.dumps({c: _texto(v) for c, v in (evento.registro or {}).items()})),
+                )
+        return recusados
+
+    def _registrar_liberacao(self, ns):
+        # Permanência concluída em manutenção: entrada registrada e saída agora,
+        # somada também ao rollup do dia da saída
+        saida = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        ultima = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM liberacoes").fetchone()[0]
+        self.conn.execute(
+            "INSERT INTO liberacoes (ns, entrada, saida) "
+            "SELECT ns, data || ' ' || hora, ? FROM manutencao WHERE ns = ? AND data IS NOT NULL AND hora IS NOT NULL",
+            (saida, ns),
+        )
+        self.conn.execute(
+            "INSERT INTO permanencias (dia, liberacoes, soma, maior) " + _PERMANENCIAS.format("id > ?") +
+            " ON CONFLICT(dia) DO UPDATE SET liberacoes = liberacoes + excluded.liberacoes, "
+            "soma = soma + excluded.soma, maior = MAX(maior, excluded.maior)",
+            (ultima,),
+        )
+
+    def releases(self, desde=None):
+        # (entrada, saída) das liberações da manutenção com saída a partir de `desde`
+        # (padrão: todas), da mais antiga à mais recente
+        with self._lock:
+            if desde:
+                return self.conn.execute(
+                    "SELECT entrada, saida FROM liberacoes WHERE saida >= ? ORDER BY id", (desde,)
+                ).fetchall()
+            return self.conn.execute("SELECT entrada, saida FROM liberacoes ORDER BY id").fetchall()
+
+    def dwell_summary(self):
+        # Rollup de permanência por dia de liberação: dia -> (liberações, soma e maior em segundos)
+        with self._lock:
+            return {dia: (liberacoes, soma, maior) for dia, liberacoes, soma, maior in self.conn.execute(
+                "SELECT dia, liberacoes, soma, maior FROM permanencias"
+            )}
+
+    def _auditar(self, evento, nome, campos):
+        # Guarda só os campos que mudaram: {campo: [antes, depois]}
+        linha = self.conn.execute(
+            f"SELECT {', '.join(c for c, _ in campos)} FROM {nome} WHERE ns = ? LIMIT 1", (evento.ns,)
+        ).fetchone()
+        if linha is None:
+            return
+        alteracoes = {
+            COLUNAS[evento.tabela][self.TABELAS[evento.tabela][1].index(c)]: [antes, depois]
+            for (c, depois), antes in zip(campos, linha) if antes != depois
+        }
+        if alteracoes:
+            self.conn.execute(
+                "INSERT INTO auditoria (momento, estacao, tabela, ns, ns_novo, alteracoes) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (datetime.datetime.now().isoformat(timespec="seconds"), self.estacao, evento.tabela,
+                 evento.ns, evento.registro.get("NS", evento.ns), json.dumps(alteracoes, ensure_ascii=False)),
+            )
+
+    def history(self, ns):
+        # Alterações em que o registro tinha ou passou a ter este NS, da mais antiga à mais recente
+        with self._lock:
+            linhas = self.conn.execute(
+                "SELECT momento, estacao, tabela, alteracoes FROM auditoria "
+                "WHERE ns = ? OR ns_novo = ? ORDER BY id", (ns, ns)
+            ).fetchall()
+        return [(momento, estacao, tabela, json.loads(alteracoes)) for momento, estacao, tabela, alteracoes in linhas]
+
+    def __contains__(self, ns):
+        # NS em qualquer partição, inclusive as que não estão carregadas
+        with self._lock:
+            return self._existe(ns, *self.TABELAS)
+
+    def existing(self, serials):
+        # NS da lista já gravados em qualquer tabela ou partição, numa única consulta
+        consulta = " UNION ".join(
+            f"SELECT ns FROM {nome} WHERE ns IN (SELECT value FROM json_each(?))"
+            for nome, _ in self.TABELAS.values()
+        )
+        lista = json.dumps([str(ns) for ns in serials])
+        with self._lock:
+            return {ns for (ns,) in self.conn.execute(consulta, (lista,) * len(self.TABELAS))}
+
+    def _data_arquivada(self, evento):
+        if not self.fechado_ate:
+            return False
+        if evento.acao == "inserir":
+            return str(evento.registro.get("Data") or "") < self.fechado_ate
+        if evento.acao == "editar" and str(evento.registro.get("Data", self.fechado_ate)) < self.fechado_ate:
+            return True
+        return self.conn.execute(
+            "SELECT 1 FROM producao WHERE ns = ? AND data < ? LIMIT 1", (evento.ns, self.fechado_ate)
+        ).fetchone() is not None
+
+    def _ajustar_particao(self, data, delta):
+        linha = self.conn.execute(
+            "SELECT producao_por_dia FROM particoes WHERE mes = ?", (data[:7],)
+        ).fetchone()
+        if linha:
+            por_dia = Counter(json.loads(linha[0]))
+            por_dia[data] += delta
+            self.conn.execute(
+                "UPDATE particoes SET producao_por_dia = ? WHERE mes = ?",
+                (json.dumps({d: n for d, n in por_dia.items() if n > 0}), data[:7]),
+            )
+
+    def close_partitions(self, inicio_aberta):
+        # Fecha os meses anteriores a `inicio_aberta` (AAAA-MM-01): grava os agregados
+        # diários de cada um e passa a recusar inserções e edições neles.
+        # Só os meses fechados desde a última execução são lidos.
+        with self._lock:
+            if self.fechado_ate >= inicio_aberta:
+                return
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._ler_fechado_ate()
+                if self.fechado_ate >= inicio_aberta:
+                    self.conn.execute("COMMIT")
+                    return
+                por_mes = {}
+                for data, unidades in self.conn.execute(
+                    "SELECT data, COUNT(*) FROM producao WHERE data >= ? AND data < ? GROUP BY data",
+                    (self.fechado_ate, inicio_aberta),
+                ):
+                    por_mes.setdefault(data[:7], {})[data] = unidades
+                for mes, por_dia in por_mes.items():
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO particoes (mes, producao_por_dia) VALUES (?, ?)",
+                        (mes, json.dumps(por_dia)),
+                    )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('fechado_ate', ?)", (inicio_aberta,)
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.fechado_ate = inicio_aberta
+
+    def archive_summary(self):
+        # Agregados pré-calculados dos meses fechados, sem ler as linhas
+        with self._lock:
+            por_dia = Counter()
+            for (json_por_dia,) in self.conn.execute("SELECT producao_por_dia FROM particoes"):
+                por_dia.update(json.loads(json_por_dia))
+            linha = self.conn.execute(
+                "SELECT ns FROM producao WHERE data < ? ORDER BY id DESC LIMIT 1", (self.fechado_ate,)
+            ).fetchone()
+        return {"producao_por_dia": por_dia, "total": sum(por_dia.values()),
+                "ultimo_ns": linha[0] if linha else None}
+
+    def find_archived(self, ns):
+        # Registro de produção de um mês fechado, ou None
+        with self._lock:
+            linha = self.conn.execute(
+                "SELECT ns, data, hora FROM producao WHERE ns = ? AND data < ?", (ns, self.fechado_ate)
+            ).fetchone()
+        return dict(zip(COLUNAS["Producao"], linha)) if linha else None
+
+    def _busca(self):
+        # Conexão só de leitura para a busca a cada tecla, na thread da interface:
+        # em WAL ela não espera o lote que a persistência está gravando em `conn`
+        if self._conn_busca is None:
+            uri = pathlib.Path(self.file_name).absolute().as_uri() + "?mode=ro"
+            self._conn_busca = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=10)
+        return self._conn_busca
+
+    def find_archived_prefix(self, prefixo, limite=20):
+        # Registros de meses fechados cujo NS começa com `prefixo`, em ordem de NS;
+        # faixa [prefixo, prefixo + maior caractere) no índice idx_producao_ns
+        linhas = self._busca().execute(
+            "SELECT ns, data, hora FROM producao WHERE ns >= ? AND ns < ? AND data < ? ORDER BY ns LIMIT ?",
+            (prefixo, prefixo + "\U0010ffff", self.fechado_ate, limite),
+        ).fetchall()
+        return [dict(zip(COLUNAS["Producao"], linha)) for linha in linhas]
+
+    def archived_position(self, ns):
+        # (posição, id) do registro arquivado em range_view(data, data) do seu dia, ou None
+        with self._lock:
+            linha = self.conn.execute(
+                "SELECT id, data, COALESCE(hora, '') FROM producao WHERE ns = ? AND data < ?",
+                (ns, self.fechado_ate),
+            ).fetchone()
+            if linha is None:
+                return None
+            id_, data, hora = linha
+            posicao = self.conn.execute(
+                "SELECT COUNT(*) FROM producao WHERE data = ? AND (COALESCE(hora, ''), id) < (?, ?)",
+                (data, hora, id_),
+            ).fetchone()[0]
+        return posicao, -id_
+
+    def released_among(self, serials):
+        # NS da lista que já saíram da manutenção alguma vez, numa única consulta
+        lista = json.dumps([str(ns) for ns in serials])
+        return {ns for (ns,) in self._busca().execute(
+            "SELECT DISTINCT ns FROM liberacoes WHERE ns IN (SELECT value FROM json_each(?))", (lista,)
+        )}
+
+    def range_view(self, inicio, fim, ate=None):
+        # Produção dos meses fechados entre as datas, paginada direto do banco;
+        # `ate` limita aos meses anteriores à partição carregada em memória
+        return _IntervaloArquivado(self, inicio, fim, ate)
+
+    def changes_since(self):
+        # Eventos gravados por outras estações desde a última consulta.
+        # `completo` é False se o journal já foi podado além desse ponto.
+        with self._lock:
+            primeiro = self.conn.execute("SELECT MIN(id) FROM eventos").fetchone()[0]
+            completo = primeiro is None or primeiro <= self.ultimo_evento + 1
+            linhas = self.conn.execute(
+                "SELECT id, estacao, tabela, acao, ns, registro FROM eventos WHERE id > ? ORDER BY id",
+                (self.ultimo_evento,),
+            ).fetchall()
+        eventos = []
+        for id_, estacao, tabela, acao, ns, registro in linhas:
+            self.ultimo_evento = id_
+            if estacao != self.estacao:
+                eventos.append(Evento(tabela, acao, ns, json.loads(registro) if registro else None))
+        return eventos, completo
+
+    def _consulta(self, tabela, inicio, fim):
+        nome, colunas = self.TABELAS[tabela]
+        if inicio and fim:
+            return f"FROM {nome} WHERE data BETWEEN ? AND ?", (inicio, fim)
+        return f"FROM {nome}", ()
+
+    def count(self, tabela, inicio=None, fim=None):
+        origem, parametros = self._consulta(tabela, inicio, fim)
+        with self._lock:
+            return self.conn.execute(f"SELECT COUNT(*) {origem}", parametros).fetchone()[0]
+
+    def iter_chunks(self, tabela, inicio=None, fim=None, tamanho=50_000):
+        # Leitura em blocos por uma conexão própria: em WAL não bloqueia as gravações
+        _, colunas = self.TABELAS[tabela]
+        origem, parametros = self._consulta(tabela, inicio, fim)
+        conn = sqlite3.connect(self.file_name, timeout=10)
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(colunas)} {origem} ORDER BY id", parametros)
+            while True:
+                bloco = cursor.fetchmany(tamanho)
+                if not bloco:
+                    break
+                yield bloco
+        finally:
+            conn.close()
+
+    def prune_events(self):
+        with self._lock:
+            self.conn.execute(
+                "DELETE FROM eventos WHERE id <= (SELECT MAX(id) FROM eventos) - ?",
+                (self.EVENTOS_MANTIDOS,),
+            )
+
+    def needs_import(self):
+        # A migração conta como feita só com a marca em `meta`; bancos anteriores
+        # à marca que já têm dados não são migrados de novo
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE chave = 'migrado'").fetchone():
+                return False
+            return not self._existe_alguma_linha()
+
+    def _existe_alguma_linha(self):
+        return any(
+            self.conn.execute(f"SELECT 1 FROM {nome} LIMIT 1").fetchone()
+            for nome, _ in self.TABELAS.values()
+        )
+
+    def import_xlsx(self, path):
+        # Migração única do producao.xlsx antigo para o banco. Os dados e a marca
+        # de migração entram na mesma transação: se algo falhar, nada é gravado e
+        # a migração é tentada de novo na próxima abertura.
+        legado = ExcelStorage(path)
+        dados = legado.load()
+        eventos = [
+            Evento(tabela, "inserir", linha[0], dict(zip(COLUNAS[tabela], linha)))
+            for tabela, linhas in dados.items()
+            for linha in linhas
+        ]
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._gravar(eventos, verificar=False)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('migrado', ?)", (path,)
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def export_xlsx(self, path):
+        import pandas as pd
+        with self._lock:
+            dados = self._ler_tabelas()
+        with pd.ExcelWriter(path, engine="xlsxwriter") as writer:
+            for tabela, linhas in dados.items():
+                df = pd.DataFrame(linhas, columns=COLUNAS[tabela])
+                df.to_excel(writer, sheet_name=tabela, index=False)
+
+    def close(self):
+        # Em WAL com synchronous=NORMAL um commit não espera o fsync e pode se
+        # perder numa queda de energia. Ao fechar, o WAL é sincronizado e
+        # transferido para o banco antes de a aplicação sair.
+        with self._lock:
+            try:
+                self.conn.execute("PRAGMA synchronous=FULL")
+                self.conn.execute("PRAGMA wal_checkpoint(FULL)")
+            except sqlite3.OperationalError:
+                pass  # banco ocupado por outra estação: o checkpoint fica para ela
+            finally:
+                self.conn.close()
+                if self._conn_busca is not None:
+                    self._conn_busca.close()
+
+
+class _ListaVazia:
+    def __len__(self):
+        return 0
+
+    def fatia(self, inicio, fim):
+        return []
+
+
+class _IntervaloArquivado:
+    # Mesma interface de fatia das tabelas em memória; ids negativos não colidem
+    # com os ids da partição aberta
+    def __init__(self, storage, inicio, fim, ate=None):
+        self.storage = storage
+        self.parametros = (inicio, fim, min(ate or storage.fechado_ate, storage.fechado_ate))
+        with storage._lock:
+            self._tamanho = storage.conn.execute(
+                "SELECT COUNT(*) FROM producao WHERE data BETWEEN ? AND ? AND data < ?", self.parametros
+            ).fetchone()[0]
+
+    def __len__(self):
+        return self._tamanho
+
+    def fatia(self, inicio, fim):
+        with self.storage._lock:
+            linhas = self.storage.conn.execute(
+                "SELECT id, ns, data, hora FROM producao WHERE data BETWEEN ? AND ? AND data < ? "
+                "ORDER BY data, hora, id LIMIT ? OFFSET ?",
+                self.parametros + (max(0, fim - inicio), inicio),
+            ).fetchall()
+        return [(-id_, (ns, data, hora)) for id_, ns, data, hora in linhas]
+
+
+def _texto(valor):
+    # Normaliza células lidas do Excel para o formato de texto usado na aplicação
+    if valor is None or valor != valor:  # None ou NaN
+        return None
+    if isinstance(valor, datetime.time):
+        return valor.strftime("%H:%M:%S")
+    if hasattr(valor, "strftime"):
+        return valor.strftime("%Y-%m-%d")
+    return str(valor)
+
+
+def open_storage(file_name, legado=None):
+    # Escolhe o backend pela extensão do arquivo
+    if file_name.endswith(".xlsx"):
+        return ExcelStorage(file_name)
+    storage = SQLiteStorage(file_name)
+    if legado and os.path.exists(legado) and storage.needs_import():
+        try:
+            storage.import_xlsx(legado)
+        except BaseException:
+            storage.close()
+            raise
+    storage.prune_events()
+    return storage
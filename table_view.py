@@ -0,0 +1,95 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class ListaLinhas:
+    # Adapta uma lista de (id, valores) à interface de RecordTable usada pela tabela
+    def __init__(self, linhas):
+        self.linhas = list(linhas)
+
+    def __len__(self):
+        return len(self.linhas)
+
+    def fatia(self, inicio, fim):
+        return self.linhas[inicio:fim]
+
+
+class PagedTable:
+    # Treeview paginada: só a página visível é materializada e cada
+    # atualização aplica apenas as diferenças em relação ao que já está na tela
+    def __init__(self, tree, parent, page_size=500):
+        self.tree = tree
+        self.page_size = page_size
+        self.pagina = None  # None acompanha a última página (registros mais recentes)
+        self.fonte = ListaLinhas([])
+        self._exibidas = {}
+
+        nav = ttk.Frame(parent)
+        nav.pack(side=tk.BOTTOM, fill=tk.X)
+        ttk.Button(nav, text="◀", width=3, command=self.pagina_anterior).pack(side=tk.LEFT)
+        ttk.Button(nav, text="▶", width=3, command=self.proxima_pagina).pack(side=tk.LEFT)
+        self.lbl_pagina = ttk.Label(nav, text="")
+        self.lbl_pagina.pack(side=tk.LEFT, padx=5)
+
+    def total_paginas(self):
+        return max(1, -(-len(self.fonte) // self.page_size))
+
+    def pagina_atual(self):
+        if self.pagina is None:
+            return self.total_paginas() - 1
+        return min(self.pagina, self.total_paginas() - 1)
+
+    def mostrar(self, fonte):
+        self.fonte = fonte
+        self.refresh()
+
+    def refresh(self):
+        pagina = self.pagina_atual()
+        inicio = pagina * self.page_size
+        self._sincronizar(self.fonte.fatia(inicio, inicio + self.page_size))
+        self.lbl_pagina.config(
+            text=f"Página {pagina + 1}/{self.total_paginas()} ({len(self.fonte)} registros)"
+        )
+
+    def _sincronizar(self, janela):
+        novas = {str(id_): tuple(str(v) for v in valores) for id_, valores in janela}
+
+        removidas = [iid for iid in self._exibidas if iid not in novas]
+        if removidas:
+            self.tree.delete(*removidas)
+
+        # Se a ordem relativa das linhas mantidas mudou (ex.: troca entre a visão
+        # completa e um filtro por data), elas são reposicionadas
+        mantidas_antes = [iid for iid in self._exibidas if iid in novas]
+        mantidas_depois = [iid for iid in novas if iid in self._exibidas]
+        reordenar = mantidas_antes != mantidas_depois
+
+        for indice, (iid, valores) in enumerate(novas.items()):
+            atuais = self._exibidas.get(iid)
+            if atuais is None:
+                self.tree.insert("", indice, iid=iid, values=valores)
+                continue
+            if atuais != valores:
+                self.tree.item(iid, values=valores)
+            if reordenar:
+                self.tree.move(iid, "", indice)
+
+        self._exibidas = novas
+
+    def ir_para(self, posicao, id_):
+        # Mostra a página da linha na posição `posicao` da fonte e a seleciona
+        self.pagina = posicao // self.page_size
+        self.refresh()
+        iid = str(id_)
+        if iid in self._exibidas:
+            self.tree.selection_set(iid)
+            self.tree.see(iid)
+
+    def pagina_anterior(self):
+        self.pagina = max(0, self.pagina_atual() - 1)
+        self.refresh()
+
+    def proxima_pagina(self):
+        pagina = self.pagina_atual() + 1
+        self.pagina = None if pagina >= self.total_paginas() - 1 else pagina
+        self.refresh()
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos da aplicação ficam na raiz do repositório, fora de um pacote
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import SQLiteStorage  # noqa: E402
+
+
+@pytest.fixture
+def estacoes(tmp_path):
+    # Duas estações abrindo o mesmo arquivo
+    caminho = str(tmp_path / "producao.db")
+    s1 = SQLiteStorage(caminho, estacao="s1")
+    s2 = SQLiteStorage(caminho, estacao="s2")
+    yield s1, s2
+    s1.close()
+    s2.close()
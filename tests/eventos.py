@@ -0,0 +1,10 @@
+from storage import Evento
+
+
+# Eventos de exemplo usados pelos testes do armazenamento
+def inserir(ns, data, hora="08:00:00"):
+    return Evento("Producao", "inserir", ns, {"NS": ns, "Data": data, "Hora": hora})
+
+
+def manutencao(ns, data="2026-10-02", hora="08:00:00"):
+    return Evento("Manutencao", "inserir", ns, {"NS": ns, "Status": "Estoque", "Data": data, "Hora": hora})
@@ -0,0 +1,67 @@
+import random
+
+from records import DateIndex, PrefixIndex, RecordTable
+
+PRODUCAO = ["NS", "Data", "Hora"]
+MANUTENCAO = ["NS", "Status", "Data", "Hora"]
+
+
+class TabelaPequena(RecordTable):
+    # Compacta cedo para exercitar a compactação com poucas linhas
+    COMPACTAR_MINIMO = 4
+
+
+def registro(ns, data="2026-10-01", hora="08:00:00"):
+    return {"NS": ns, "Data": data, "Hora": hora}
+
+
+def operacoes_aleatorias(semente, passos=600):
+    # Sequência aleatória de operações sobre as duas tabelas, com um modelo em dicionário
+    aleatorio = random.Random(semente)
+    producao = TabelaPequena(PRODUCAO)
+    manutencao = TabelaPequena(MANUTENCAO, categorias=("Status",))
+    modelo = {"producao": {}, "manutencao": {}}
+    indice_datas = DateIndex(producao)
+    indice_ns = PrefixIndex(producao, manutencao)
+    proximo = iter(range(10 ** 6))
+
+    def instante():
+        return (f"2026-10-{aleatorio.randint(1, 5):02d}",
+                f"{aleatorio.randint(0, 23):02d}:{aleatorio.randint(0, 59):02d}:00")
+
+    for _ in range(passos):
+        operacao = aleatorio.random()
+        if operacao < 0.45 or not modelo["producao"]:
+            ns = f"GF{aleatorio.randint(0, 99):02d}{next(proximo)}"
+            data, hora = instante()
+            producao.inserir(registro(ns, data, hora))
+            modelo["producao"][ns] = (ns, data, hora)
+        elif operacao < 0.6:
+            ns = aleatorio.choice(list(modelo["producao"]))
+            producao.remover(ns)
+            del modelo["producao"][ns]
+        elif operacao < 0.75:
+            # Vai para a manutenção
+            ns = aleatorio.choice(list(modelo["producao"]))
+            producao.remover(ns)
+            del modelo["producao"][ns]
+            data, hora = instante()
+            status = aleatorio.choice(["Estoque", "Produção"])
+            manutencao.inserir({"NS": ns, "Status": status, "Data": data, "Hora": hora})
+            modelo["manutencao"][ns] = (ns, status, data, hora)
+        elif operacao < 0.85 and modelo["manutencao"]:
+            ns = aleatorio.choice(list(modelo["manutencao"]))
+            manutencao.remover(ns)
+            del modelo["manutencao"][ns]
+        else:
+            ns = aleatorio.choice(list(modelo["producao"]))
+            data, hora = instante()
+            novo = ns if aleatorio.random() < 0.5 else f"RN{next(proximo)}"
+            producao.editar(ns, {"NS": novo, "Data": data, "Hora": hora})
+            del modelo["producao"][ns]
+            modelo["producao"][novo] = (novo, data, hora)
+        if aleatorio.random() < 0.1:
+            # Consultas no meio das mudanças constroem os índices preguiçosos
+            indice_datas.intervalo("2026-10-01", "2026-10-05")
+            indice_ns.buscar("GF")
+    return producao, manutencao, modelo, indice_datas, indice_ns
@@ -0,0 +1,58 @@
+from aggregates import DailyAggregates
+from records import RecordTable
+from storage import COLUNAS
+from tabelas import registro
+
+
+def agregados(arquivo=None):
+    producao = RecordTable(COLUNAS["Producao"])
+    manutencao = RecordTable(COLUNAS["Manutencao"], categorias=("Status",))
+    return producao, manutencao, DailyAggregates(producao, manutencao, arquivo)
+
+
+def test_contadores_acompanham_os_eventos():
+    producao, manutencao, cache = agregados()
+    producao.estender([registro("A", "2026-10-01"), registro("B", "2026-10-01"), registro("C", "2026-10-02")])
+    assert cache.serie_diaria() == [("2026-10-01", 2), ("2026-10-02", 1)]
+    assert cache.ultimo_ns == "C"
+    versao = cache.versao
+
+    producao.editar("A", {"Data": "2026-10-02"})
+    producao.remover("C")
+    manutencao.inserir({"NS": "C", "Status": "Estoque", "Data": "2026-10-02", "Hora": "10:00:00"})
+    assert cache.versao > versao
+    assert cache.serie_diaria() == [("2026-10-01", 1), ("2026-10-02", 1)]
+    assert cache.ultimo_ns == "B"
+    assert cache.producao_hoje("2026-10-02") == 1
+    assert cache.manutencoes_hoje("2026-10-02") == 1
+    assert cache.total_producao() == 2
+    assert cache.media_diaria() == 1.0
+
+
+def test_meses_fechados_entram_pelo_arquivo():
+    arquivo = {"producao_por_dia": {"2026-09-30": 3}, "total": 3, "ultimo_ns": "S3"}
+    producao, _, cache = agregados(arquivo)
+    assert cache.ultimo_ns == "S3"
+    assert cache.total_producao() == 3
+    producao.inserir(registro("O1", "2026-10-01"))
+    assert cache.serie_diaria() == [("2026-09-30", 3), ("2026-10-01", 1)]
+    assert cache.media_diaria() == 2.0
+
+    cache.remover_arquivado({"NS": "S1", "Data": "2026-09-30", "Hora": "08:00:00"})
+    assert cache.total_producao() == 3
+    assert cache.serie_diaria()[0] == ("2026-09-30", 2)
+
+
+def test_resumo_de_outro_dia():
+    producao, _, cache = agregados()
+    producao.estender([registro("A", "2026-10-01"), registro("B", "2026-10-02")])
+    assert cache.resumo("2026-10-01") == [("Máquinas Hoje", 1), ("Total Produção", 2),
+                                          ("Manutenções Hoje", 0), ("Total Manutenções", 0)]
+
+
+def test_releitura_recalcula():
+    producao, _, cache = agregados()
+    producao.inserir(registro("A", "2026-10-01"))
+    producao.carregar([("B", "2026-10-05", "08:00:00")])
+    assert cache.serie_diaria() == [("2026-10-05", 1)]
+    assert cache.ultimo_ns == "B"
@@ -0,0 +1,95 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from analytics import ThroughputAnalytics, dia_do_turno
+from eventos import manutencao
+from records import RecordTable
+from storage import COLUNAS, Evento, SQLiteStorage
+from tabelas import registro
+
+
+def tabelas():
+    return RecordTable(COLUNAS["Producao"]), RecordTable(COLUNAS["Manutencao"], categorias=("Status",))
+
+
+def test_horas_depois_da_meia_noite_sao_do_terceiro_turno_da_vespera():
+    producao, manutencao_ = tabelas()
+    producao.estender([registro("A", "2026-10-01", "07:00:00"), registro("B", "2026-10-01", "15:00:00"),
+                       registro("C", "2026-10-01", "23:00:00"), registro("D", "2026-10-02", "02:00:00"),
+                       registro("E", "2026-10-02", "07:00:00")])
+    analise = ThroughputAnalytics(producao, manutencao_)
+    assert analise.por_turno("2026-10-01") == [("1º Turno", 1), ("2º Turno", 1), ("3º Turno", 2)]
+    assert analise.por_turno("2026-10-02") == [("1º Turno", 1), ("2º Turno", 0), ("3º Turno", 0)]
+    producao.inserir(registro("F", "2026-10-02", "05:59:59"))
+    assert analise.por_turno("2026-10-01")[2] == ("3º Turno", 3)
+    assert dia_do_turno(datetime(2026, 10, 2, 5, 59)) == date(2026, 10, 1)
+    assert dia_do_turno(datetime(2026, 10, 2, 6, 0)) == date(2026, 10, 2)
+
+
+def test_rollup_gravado_nao_e_somado_de_novo_com_as_liberacoes():
+    producao, manutencao_ = tabelas()
+    liberacoes = [("2026-10-01 08:00:00", "2026-10-01 09:00:00")]
+    gravado = {"2026-10-01": (2, 7200.0, 5400.0)}
+    analise = ThroughputAnalytics(producao, manutencao_, liberacoes, gravado)
+    assert analise.permanencia_media("2026-10-01") == 3600
+    # Sem rollup gravado ele é montado das liberações
+    assert ThroughputAnalytics(producao, manutencao_, liberacoes).permanencia_media("2026-10-01") == 3600
+
+    hoje = date.today().isoformat()
+    manutencao_.inserir({"NS": "M", "Status": "Estoque", "Data": hoje, "Hora": "00:00:00"})
+    manutencao_.remover("M")
+    liberacoes_hoje, _, _ = analise.permanencia_por_dia[hoje]
+    assert liberacoes_hoje == 1
+
+
+def test_tempo_parado_num_momento_passado_conta_as_liberadas_depois():
+    producao, manutencao_ = tabelas()
+    manutencao_.inserir({"NS": "M1", "Status": "Estoque", "Data": "2026-10-01", "Hora": "20:00:00"})
+    liberacoes = [("2026-10-01 18:00:00", "2026-10-02 08:00:00"),  # parada no fim do dia
+                  ("2026-10-01 08:00:00", "2026-10-01 12:00:00")]  # já liberada
+    analise = ThroughputAnalytics(producao, manutencao_, liberacoes)
+    fim_do_dia = datetime(2026, 10, 2)
+    assert analise.permanencia_atual_media(fim_do_dia) == pytest.approx((4 + 6) / 2 * 3600)
+
+
+def test_liberacao_da_manutencao_e_gravada(estacoes):
+    s1, s2 = estacoes
+    s1.apply([manutencao("M", "2026-10-02", "08:00:00")])
+    s2.apply([Evento("Manutencao", "remover", "M", None)])
+    [(entrada, saida)] = s1.releases()
+    assert entrada == "2026-10-02 08:00:00"
+    assert saida > entrada
+    assert s1.released_among(["M", "N"]) == {"M"}
+
+
+def test_rollup_de_permanencia_gravado_por_dia(estacoes):
+    s1, s2 = estacoes
+    entrada = datetime.now() - timedelta(hours=2)
+    s1.apply([manutencao("M", entrada.strftime("%Y-%m-%d"), entrada.strftime("%H:%M:%S")),
+              manutencao("N", "data?", "08:00:00")])
+    s2.apply([Evento("Manutencao", "remover", "M", None), Evento("Manutencao", "remover", "N", None)])
+    [(dia, (liberacoes, soma, maior))] = s1.dwell_summary().items()
+    assert dia == date.today().isoformat()
+    assert liberacoes == 1
+    assert soma == maior == pytest.approx(7200, abs=5)
+    assert s1.releases(desde=dia) == s1.releases()
+    assert s1.releases(desde=(date.today() + timedelta(days=1)).isoformat()) == []
+
+
+def test_rollup_montado_para_banco_anterior_a_ele(tmp_path):
+    caminho = str(tmp_path / "producao.db")
+    storage = SQLiteStorage(caminho)
+    storage.conn.executemany(
+        "INSERT INTO liberacoes (ns, entrada, saida) VALUES (?, ?, ?)",
+        [("A", "2026-10-01 08:00:00", "2026-10-01 09:00:00"), ("B", "2026-10-01 08:00:00", "2026-10-01 11:00:00"),
+         ("C", "2026-10-02 08:00:00", "2026-10-02 08:30:00")],
+    )
+    storage.close()
+    storage = SQLiteStorage(caminho)
+    assert storage.dwell_summary() == {"2026-10-01": (2, 14400.0, 10800.0), "2026-10-02": (1, 1800.0, 1800.0)}
+    storage.close()
+    # Só na primeira abertura: o rollup não é somado de novo
+    storage = SQLiteStorage(caminho)
+    assert storage.dwell_summary()["2026-10-01"][0] == 2
+    storage.close()
@@ -0,0 +1,22 @@
+from eventos import inserir, manutencao
+from storage import Evento
+
+
+def test_edicao_fica_no_historico(estacoes):
+    s1, _ = estacoes
+    s1.apply([inserir("A", "2026-10-01")])
+    s1.apply([Evento("Producao", "editar", "A", {"NS": "B", "Hora": "09:00:00"})])
+    [(_, estacao, tabela, alteracoes)] = s1.history("B")
+    assert (estacao, tabela) == ("s1", "Producao")
+    assert alteracoes == {"NS": ["A", "B"], "Hora": ["08:00:00", "09:00:00"]}
+    assert s1.history("A") == s1.history("B")
+
+
+def test_edicao_sem_mudanca_nao_entra_no_historico(estacoes):
+    s1, s2 = estacoes
+    s1.apply([manutencao("M")])
+    s2.apply([Evento("Manutencao", "editar", "M", {"Status": "Estoque"})])
+    assert s1.history("M") == []
+    s2.apply([Evento("Manutencao", "editar", "M", {"Status": "Produção"})])
+    [(_, estacao, tabela, alteracoes)] = s1.history("M")
+    assert (estacao, tabela, alteracoes) == ("s2", "Manutencao", {"Status": ["Estoque", "Produção"]})
@@ -0,0 +1,54 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from bulk_import import read_batch, validate_batch  # noqa: E402
+from eventos import inserir  # noqa: E402
+from records import RecordTable  # noqa: E402
+from storage import COLUNAS, SQLiteStorage  # noqa: E402
+
+
+def arquivo(tmp_path, texto, encoding="utf-8"):
+    caminho = tmp_path / "lote.csv"
+    caminho.write_text(texto, encoding=encoding)
+    return str(caminho)
+
+
+def test_csv_com_ponto_e_virgula_do_excel(tmp_path):
+    lote = read_batch(arquivo(tmp_path, "NS;Data;Hora\nGF001;2026-10-01;08:00:00\n", encoding="utf-8-sig"))
+    assert lote.to_dict("records") == [{"NS": "GF001", "Data": "2026-10-01", "Hora": "08:00:00"}]
+
+
+def test_texto_com_um_ns_por_linha(tmp_path):
+    lote = read_batch(arquivo(tmp_path, "GF001\nGF-2026-002\n"))
+    assert list(lote["NS"]) == ["GF001", "GF-2026-002"]
+    assert list(read_batch(arquivo(tmp_path, "NS\nGF001\n"))["NS"]) == ["GF001"]
+
+
+def test_rejeitados_com_a_linha_do_arquivo_e_o_motivo(tmp_path):
+    texto = ("NS,Data,Hora\n"
+             "GF001,2026-10-01,08:00:00\n"
+             "GF002,17/10/2026,08:00:00\n"
+             "GF003,2026-10-01,8h\n"
+             "GF001,2026-10-01,09:00:00\n"
+             ",2026-10-01,09:00:00\n")
+    aceitos, rejeitados = validate_batch(read_batch(arquivo(tmp_path, texto)))
+    assert [r["NS"] for r in aceitos] == ["GF001"]
+    assert [(linha, ns) for linha, ns, _ in rejeitados] == [(3, "GF002"), (4, "GF003"), (5, "GF001"), (6, "")]
+    assert rejeitados[0][2] == rejeitados[1][2] == "data/hora fora do formato (AAAA-MM-DD HH:MM:SS)"
+    assert rejeitados[2][2] == "repetido no lote"
+    assert rejeitados[3][2] == "número de série vazio"
+
+
+def test_ns_existente_e_mes_fechado(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "producao.db"))
+    storage.apply([inserir("ARQ", "2026-09-01")])
+    storage.close_partitions("2026-10-01")
+    producao = RecordTable(COLUNAS["Producao"])
+    producao.inserir({"NS": "MEM", "Data": "2026-10-01", "Hora": "08:00:00"})
+    lote = pd.DataFrame({"NS": ["ARQ", "MEM", "SET", "OUT"],
+                         "Data": ["2026-10-02", "2026-10-02", "2026-09-30", "2026-10-02"]})
+    aceitos, rejeitados = validate_batch(lote, producao, storage=storage)
+    assert [r["NS"] for r in aceitos] == ["OUT"]
+    assert [motivo for _, _, motivo in rejeitados] == ["já registrado", "já registrado", "data em mês fechado"]
+    storage.close()
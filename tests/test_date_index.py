@@ -0,0 +1,30 @@
+import pytest
+
+from records import DateIndex, RecordTable
+from tabelas import PRODUCAO, operacoes_aleatorias, registro
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_date_index_igual_a_busca_linear(semente):
+    producao, _, modelo, indice_datas, _ = operacoes_aleatorias(semente)
+    for inicio, fim in (("2026-10-01", "2026-10-05"), ("2026-10-02", "2026-10-03"), ("2026-10-04", "2026-10-04")):
+        intervalo = indice_datas.intervalo(inicio, fim)
+        esperado = sorted((valores for valores in modelo["producao"].values() if inicio <= valores[1] <= fim),
+                          key=lambda valores: (valores[1], valores[2]))
+        obtido = [valores for _, valores in intervalo.fatia(0, len(intervalo))]
+        assert len(intervalo) == len(esperado)
+        assert [(v[1], v[2]) for v in obtido] == [(v[1], v[2]) for v in esperado]
+        assert sorted(obtido) == sorted(esperado)
+
+
+def test_indice_acompanha_edicao_de_data_e_releitura():
+    producao = RecordTable(PRODUCAO)
+    indice = DateIndex(producao)
+    producao.estender([registro("A", "2026-10-01"), registro("B", "2026-10-03"), registro("C", "01/10/2026")])
+    assert len(indice.intervalo("2026-10-01", "2026-10-31")) == 2
+    producao.editar("A", {"Data": "2026-10-05"})
+    intervalo = indice.intervalo("2026-10-02", "2026-10-31")
+    assert [valores[0] for _, valores in intervalo.fatia(0, len(intervalo))] == ["B", "A"]
+    producao.carregar([("D", "2026-10-02", "08:00:00")])
+    intervalo = indice.intervalo("2026-10-01", "2026-10-31")
+    assert [valores[0] for _, valores in intervalo.fatia(0, len(intervalo))] == ["D"]
@@ -0,0 +1,61 @@
+import csv
+import gzip
+
+from eventos import inserir, manutencao
+from export import ExportJob, export_paths
+from storage import SQLiteStorage
+
+
+def ler(file_path, abrir=open):
+    with abrir(file_path, "rt", newline="", encoding="utf-8") as arquivo:
+        return list(csv.reader(arquivo))
+
+
+def test_caminhos_da_manutencao_ao_lado():
+    assert export_paths("saida/dados.csv.gz") == {"Producao": "saida/dados.csv.gz",
+                                                  "Manutencao": "saida/dados_manutencao.csv.gz"}
+    assert export_paths("dados")["Manutencao"] == "dados_manutencao"
+
+
+def test_exporta_em_blocos_respeitando_o_filtro(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "producao.db"))
+    storage.apply([inserir(f"A{i}", f"2026-10-0{1 + i % 3}") for i in range(7)] + [manutencao("M")])
+    destino = str(tmp_path / "dados.csv")
+    job = ExportJob(storage, destino, filtro=("2026-10-01", "2026-10-02"), tamanho=2).start()
+    job._thread.join(5)
+    assert job.concluido and job.erro is None
+    assert job.progresso() == 1.0
+    producao = ler(destino)
+    assert producao[0] == ["NS", "Data", "Hora"]
+    assert [linha[0] for linha in producao[1:]] == ["A0", "A1", "A3", "A4", "A6"]
+    assert ler(str(tmp_path / "dados_manutencao.csv"))[1:] == [["M", "Estoque", "2026-10-02", "08:00:00"]]
+    assert not list(tmp_path.glob("*.parcial"))
+    storage.close()
+
+
+def test_csv_compactado(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "producao.db"))
+    storage.apply([inserir("A", "2026-10-01")])
+    destino = str(tmp_path / "dados.csv.gz")
+    job = ExportJob(storage, destino).start()
+    job._thread.join(5)
+    assert ler(destino, gzip.open)[1:] == [["A", "2026-10-01", "08:00:00"]]
+    storage.close()
+
+
+def test_falha_nao_deixa_arquivo_pela_metade(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "producao.db"))
+    storage.apply([inserir(f"A{i}", "2026-10-01") for i in range(5)])
+
+    def blocos(tabela, *filtro, tamanho):
+        yield [("A0", "2026-10-01", "08:00:00")]
+        raise OSError("disco cheio")
+
+    storage.iter_chunks = blocos
+    destino = tmp_path / "dados.csv"
+    job = ExportJob(storage, str(destino)).start()
+    job._thread.join(5)
+    assert isinstance(job.erro, OSError)
+    assert not destino.exists()
+    assert not list(tmp_path.glob("*.parcial"))
+    storage.close()
@@ -0,0 +1,82 @@
+from aggregates import DailyAggregates
+from eventos import inserir, manutencao
+from records import DateIndex, RecordTable
+from storage import COLUNAS, Evento
+
+
+def test_fechar_particoes_guarda_agregados_e_carrega_so_o_mes_aberto(estacoes):
+    s1, _ = estacoes
+    s1.apply([inserir("A", "2026-08-31"), inserir("B", "2026-09-01"), inserir("C", "2026-09-01"),
+              inserir("D", "2026-10-01")])
+    s1.close_partitions("2026-10-01")
+    resumo = s1.archive_summary()
+    assert resumo["producao_por_dia"] == {"2026-08-31": 1, "2026-09-01": 2}
+    assert resumo["total"] == 3
+    assert resumo["ultimo_ns"] == "C"
+    assert [ns for ns, _, _ in s1.load(desde="2026-10-01")["Producao"]] == ["D"]
+    assert s1.find_archived("B") == {"NS": "B", "Data": "2026-09-01", "Hora": "08:00:00"}
+    assert s1.find_archived("D") is None
+
+    # Fechamento incremental: só outubro é lido
+    s1.apply([inserir("E", "2026-10-15")])
+    s1.close_partitions("2026-11-01")
+    assert s1.archive_summary()["producao_por_dia"]["2026-10-15"] == 1
+    assert s1.archive_summary()["total"] == 5
+
+
+def test_mes_fechado_recusa_insercao_e_edicao(estacoes):
+    s1, _ = estacoes
+    s1.apply([inserir("A", "2026-09-10")])
+    s1.close_partitions("2026-10-01")
+    assert len(s1.apply([inserir("B", "2026-09-11")])) == 1
+    assert len(s1.apply([Evento("Producao", "editar", "A", {"Hora": "10:00:00"})])) == 1
+    assert s1.archive_summary()["total"] == 1
+
+
+def test_estacao_aberta_antes_do_fechamento_respeita_o_mes_fechado(estacoes):
+    s1, s2 = estacoes
+    s1.apply([inserir("A", "2026-09-10"), inserir("B", "2026-09-10")])
+    assert s2.fechado_ate == ""
+    s1.close_partitions("2026-10-01")
+
+    assert len(s2.apply([inserir("C", "2026-09-11")])) == 1
+    assert s2.fechado_ate == "2026-10-01"
+    # A saída de uma unidade arquivada para a manutenção ajusta os agregados
+    s2.apply([Evento("Producao", "remover", "B", None), manutencao("B")])
+    assert s1.archive_summary()["producao_por_dia"] == {"2026-09-10": 1}
+    assert s1.archive_summary()["total"] == 1
+
+
+def test_releitura_depois_que_outra_estacao_fecha_o_mes(estacoes):
+    # A estação A tem outubro em memória quando B fecha o mês: na releitura de A
+    # outubro passa a vir só dos agregados, sem contar duas vezes
+    a, b = estacoes
+    b.apply([inserir("O1", "2026-10-01"), inserir("O2", "2026-10-02"), inserir("O3", "2026-10-02")])
+    a.close_partitions("2026-10-01")
+    producao = RecordTable(COLUNAS["Producao"])
+    manutencao = RecordTable(COLUNAS["Manutencao"])
+    producao.carregar(a.load(desde=a.fechado_ate)["Producao"])
+    agregados = DailyAggregates(producao, manutencao, a.archive_summary())
+    indice = DateIndex(producao)
+    assert agregados.total_producao() == 3
+
+    b.apply([inserir("N1", "2026-11-01")])
+    b.close_partitions("2026-11-01")
+    inicio_antigo = "2026-10-01"
+    producao.carregar(a.load(desde=inicio_antigo)["Producao"])
+    agregados.definir_arquivo(a.archive_summary())
+    assert a.fechado_ate == "2026-11-01"
+    assert agregados.total_producao() == 4
+    assert agregados.serie_diaria() == [("2026-10-01", 1), ("2026-10-02", 2), ("2026-11-01", 1)]
+    assert len(indice.intervalo("2026-10-01", "2026-10-31")) == 0
+    assert len(a.range_view("2026-10-01", "2026-10-31")) == 3
+
+
+def test_intervalo_arquivado_para_antes_da_particao_em_memoria(estacoes):
+    # Estação que ainda não releu depois do fechamento: o arquivo não repete o
+    # mês que ela tem em memória
+    a, b = estacoes
+    b.apply([inserir("S1", "2026-09-30"), inserir("O1", "2026-10-01")])
+    b.close_partitions("2026-11-01")
+    assert len(b.range_view("2026-09-01", "2026-10-31")) == 2
+    assert len(b.range_view("2026-09-01", "2026-10-31", ate="2026-10-01")) == 1
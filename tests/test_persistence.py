@@ -0,0 +1,90 @@
+import shutil
+import sqlite3
+import threading
+
+from eventos import inserir
+from persistence import PersistenceWorker
+from storage import SQLiteStorage
+
+
+class ArmazenamentoFalso:
+    # Guarda os lotes recebidos; `falhas` chamadas seguidas levantam erro
+    def __init__(self, falhas=0, recusar=()):
+        self.lotes = []
+        self.falhas = falhas
+        self.recusar = set(recusar)
+        self.liberar = threading.Event()
+        self.liberar.set()
+
+    def apply(self, eventos):
+        self.liberar.wait()
+        if self.falhas:
+            self.falhas -= 1
+            raise sqlite3.OperationalError("database is locked")
+        self.lotes.append(list(eventos))
+        return [e for e in eventos if e in self.recusar]
+
+
+def test_rajada_vira_um_lote():
+    storage = ArmazenamentoFalso()
+    worker = PersistenceWorker(storage, atraso=5)
+    for evento in range(3):
+        worker.enviar([evento])
+    assert worker.estado == PersistenceWorker.PENDENTE
+    assert worker.flush(timeout=5)
+    assert storage.lotes == [[0, 1, 2]]
+    assert worker.estado == PersistenceWorker.SALVO
+    assert worker.close(timeout=5)
+
+
+def test_falha_mantem_o_lote_para_nova_tentativa():
+    storage = ArmazenamentoFalso(falhas=1)
+    worker = PersistenceWorker(storage, atraso=0.01)
+    worker.enviar([1, 2])
+    assert not worker.flush(timeout=5)
+    assert worker.estado == PersistenceWorker.FALHOU
+    assert isinstance(worker.erro, sqlite3.OperationalError)
+    worker.enviar([3])
+    assert worker.flush(timeout=5)
+    assert storage.lotes == [[1, 2, 3]]
+    assert worker.erro is None
+    assert worker.close(timeout=5)
+
+
+def test_close_so_encerra_depois_de_gravar():
+    storage = ArmazenamentoFalso()
+    storage.liberar.clear()  # gravação em andamento
+    worker = PersistenceWorker(storage, atraso=0.01)
+    worker.enviar([1])
+    assert not worker.close(timeout=0.1)
+    assert worker._thread.is_alive()
+    storage.liberar.set()
+    assert worker.close(timeout=5)
+    assert not worker._thread.is_alive()
+    assert storage.lotes == [[1]]
+
+
+def test_recusados_ficam_disponiveis_uma_vez():
+    storage = ArmazenamentoFalso(recusar=[2])
+    worker = PersistenceWorker(storage, atraso=0.01)
+    worker.enviar([1, 2])
+    assert worker.flush(timeout=5)
+    assert worker.take_rejected() == [2]
+    assert worker.take_rejected() == []
+    assert worker.close(timeout=5)
+
+
+def test_fechar_o_banco_transfere_o_wal_para_o_arquivo(tmp_path):
+    # Com outra estação aberta o WAL continua existindo; o que foi salvo tem de
+    # estar no arquivo principal, que é o que sobra numa cópia sem o WAL
+    caminho = tmp_path / "producao.db"
+    outra = SQLiteStorage(str(caminho), estacao="outra")
+    storage = SQLiteStorage(str(caminho), estacao="s1")
+    storage.apply([inserir("A", "2026-10-01")])
+    storage.close()
+    copia = tmp_path / "copia.db"
+    shutil.copyfile(caminho, copia)
+    conn = sqlite3.connect(copia)
+    assert conn.execute("SELECT ns FROM producao").fetchall() == [("A",)]
+    conn.close()
+    outra.close()
@@ -0,0 +1,108 @@
+import pytest
+
+from records import Concatenacao, RecordTable
+from tabelas import MANUTENCAO, PRODUCAO, TabelaPequena, operacoes_aleatorias, registro
+
+
+def test_inserir_get_e_contains():
+    tabela = RecordTable(PRODUCAO)
+    tabela.carregar([("A", "2026-10-01", "08:00:00")])
+    tabela.inserir(registro("B", hora="09:30:15"))
+    assert len(tabela) == 2
+    assert "B" in tabela and "C" not in tabela
+    assert tabela.get("B") == registro("B", hora="09:30:15")
+    assert tabela.get("C") is None
+    assert tabela.ultimo()["NS"] == "B"
+
+
+def test_data_hora_fora_do_formato_preservadas():
+    tabela = RecordTable(PRODUCAO)
+    tabela.carregar([("A", "01/10/2026", None), ("B", "2026-10-01", "25:00:00")])
+    assert tabela.get("A") == {"NS": "A", "Data": "01/10/2026", "Hora": None}
+    assert tabela.get("B") == {"NS": "B", "Data": "2026-10-01", "Hora": "25:00:00"}
+    assert tabela.por_dia() == {"01/10/2026": 1, "2026-10-01": 1}
+
+
+def test_editar_recusa_coluna_desconhecida_e_chave_existente():
+    tabela = RecordTable(PRODUCAO)
+    tabela.estender([registro("A"), registro("B")])
+    with pytest.raises(KeyError):
+        tabela.editar("A", {"Cor": "azul"})
+    with pytest.raises(ValueError):
+        tabela.editar("A", {"NS": "B"})
+    assert tabela.get("A") == registro("A")
+    assert tabela.editar("X", {"Hora": "10:00:00"}) is None
+
+    tabela.editar("A", {"NS": "C", "Hora": "10:00:00"})
+    assert "A" not in tabela
+    assert tabela.get("C") == registro("C", hora="10:00:00")
+
+
+def test_chaves_duplicadas_da_planilha_saem_juntas():
+    tabela = RecordTable(PRODUCAO)
+    tabela.carregar([("A", "2026-10-01", "08:00:00"), ("B", "2026-10-01", "08:00:01"),
+                     ("A", "2026-10-02", "08:00:00")])
+    assert len(tabela) == 3
+    assert tabela.get("A")["Data"] == "2026-10-02"
+    removidos = tabela.remover("A")
+    assert sorted(r["Data"] for r in removidos) == ["2026-10-01", "2026-10-02"]
+    assert [valores for _, valores in tabela.linhas()] == [("B", "2026-10-01", "08:00:01")]
+
+
+def test_compactacao_mantem_ids_e_indice():
+    tabela = TabelaPequena(PRODUCAO)
+    ids = tabela.estender([registro(f"N{i}") for i in range(10)])
+    tabela.remover_varios([f"N{i}" for i in range(6)])
+    assert tabela.ids() == ids[6:]
+    assert tabela.por_id(ids) == [(id_, ("N%d" % i, "2026-10-01", "08:00:00")) for i, id_ in enumerate(ids)
+                                  if i >= 6]
+    assert tabela.posicao("N8") == (2, ids[8])
+    assert tabela.get("N9") == registro("N9")
+    assert tabela.fatia(0, 10) == list(tabela.linhas())
+
+
+def test_ouvintes_recebem_os_eventos():
+    tabela = RecordTable(PRODUCAO)
+    eventos = []
+    tabela.ouvir(lambda acao, id_, registro, anterior: eventos.append((acao, registro and registro["NS"],
+                                                                        anterior and anterior["NS"])))
+    tabela.carregar([])
+    tabela.inserir(registro("A"))
+    tabela.editar("A", {"NS": "B"})
+    tabela.remover("B")
+    assert eventos == [("carregar", None, None), ("inserir", "A", None), ("editar", "B", "A"),
+                       ("remover", "B", None)]
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_tabelas_consistentes_com_o_modelo(semente):
+    producao, manutencao, modelo, _, _ = operacoes_aleatorias(semente)
+    for tabela, nome in ((producao, "producao"), (manutencao, "manutencao")):
+        linhas = [valores for _, valores in tabela.linhas()]
+        assert sorted(linhas) == sorted(modelo[nome].values())
+        assert len(tabela) == len(modelo[nome])
+        assert tabela.fatia(0, len(tabela)) == list(tabela.linhas())
+        for ns, valores in modelo[nome].items():
+            assert tabela.get(ns) == dict(zip(tabela.colunas, valores))
+
+
+def test_concatenacao_pagina_entre_as_partes():
+    primeira = RecordTable(PRODUCAO)
+    primeira.estender([registro(f"A{i}") for i in range(3)])
+    segunda = RecordTable(PRODUCAO)
+    segunda.estender([registro(f"B{i}") for i in range(3)])
+    juntas = Concatenacao(primeira, segunda)
+    assert len(juntas) == 6
+    assert [valores[0] for _, valores in juntas.fatia(2, 5)] == ["A2", "B0", "B1"]
+
+
+def test_frame_no_layout_das_planilhas():
+    pd = pytest.importorskip("pandas")
+    tabela = RecordTable(MANUTENCAO, categorias=("Status",))
+    tabela.estender([{"NS": "A", "Status": "Estoque", "Data": "2026-10-01", "Hora": "08:00:00"},
+                     {"NS": "B", "Status": "Produção", "Data": "2026-10-02", "Hora": "09:00:00"}])
+    tabela.remover("A")
+    frame = tabela.frame()
+    assert list(frame.columns) == MANUTENCAO
+    assert frame.to_dict("records") == [{"NS": "B", "Status": "Produção", "Data": "2026-10-02", "Hora": "09:00:00"}]
+    assert isinstance(frame["Status"].dtype, pd.CategoricalDtype)
@@ -0,0 +1,84 @@
+import time
+
+from instrumentation import profiler
+from refresh import RefreshScheduler
+
+
+class RaizFalsa:
+    # Só o que o agendador usa do Tk: after, after_idle e after_cancel
+    def __init__(self):
+        self.pendentes = {}
+        self.esperas = []
+        self._proximo = 0
+
+    def _agendar(self, callback):
+        self._proximo += 1
+        self.pendentes[self._proximo] = callback
+        return self._proximo
+
+    def after(self, ms, callback):
+        self.esperas.append(ms)
+        return self._agendar(callback)
+
+    def after_idle(self, callback):
+        return self._agendar(callback)
+
+    def after_cancel(self, id_):
+        self.pendentes.pop(id_, None)
+
+    def rodar(self):
+        while self.pendentes:
+            self.pendentes.pop(min(self.pendentes))()
+
+
+def agendador():
+    raiz = RaizFalsa()
+    atualizador = RefreshScheduler(raiz)
+    chamadas = []
+    for nome in ("tabela", "contador", "grafico"):
+        atualizador.registrar(nome, lambda nome=nome: chamadas.append(nome))
+    return raiz, atualizador, chamadas
+
+
+def test_marcacoes_juntas_redesenham_cada_vista_uma_vez():
+    raiz, atualizador, chamadas = agendador()
+    for _ in range(50):
+        atualizador.marcar("grafico", "tabela")
+    assert len(raiz.pendentes) == 1
+    raiz.rodar()
+    assert chamadas == ["tabela", "grafico"]
+
+
+def test_sem_nomes_marca_todas_as_vistas():
+    raiz, atualizador, chamadas = agendador()
+    atualizador.marcar()
+    raiz.rodar()
+    assert chamadas == ["tabela", "contador", "grafico"]
+
+
+def test_executar_antecipa_e_cancela_o_agendamento():
+    raiz, atualizador, chamadas = agendador()
+    atualizador.marcar("contador")
+    atualizador.executar()
+    assert chamadas == ["contador"]
+    assert raiz.pendentes == {}
+
+
+def test_sem_vistas_sujas_nao_registra_latencia():
+    raiz, atualizador, chamadas = agendador()
+    antes = len(profiler.amostras["atualizar_tela"])
+    atualizador.executar()
+    assert len(profiler.amostras["atualizar_tela"]) == antes
+    atualizador.registrar("lenta", profiler.fase("lenta")(lambda: None))
+    atualizador.marcar("lenta")
+    raiz.rodar()
+    assert len(profiler.amostras["atualizar_tela"]) == antes + 1
+
+
+def test_redesenho_demorado_espaca_o_seguinte():
+    raiz, atualizador, _ = agendador()
+    atualizador.registrar("lenta", lambda: time.sleep(0.05))
+    atualizador.marcar("lenta")
+    raiz.rodar()
+    atualizador.marcar("tabela")
+    assert raiz.esperas and raiz.esperas[-1] > 10
@@ -0,0 +1,23 @@
+import pytest
+
+pytest.importorskip("matplotlib")
+pytest.importorskip("fpdf")
+
+from report import ReportCache  # noqa: E402
+
+
+def test_cache_descarta_o_menos_usado():
+    cache = ReportCache(maximo=2)
+    cache.put(("2026-10-01", 1), b"a")
+    cache.put(("2026-10-02", 1), b"b")
+    assert cache.get(("2026-10-01", 1)) == b"a"
+    cache.put(("2026-10-03", 1), b"c")
+    assert cache.get(("2026-10-02", 1)) is None
+    assert cache.get(("2026-10-01", 1)) == b"a"
+    assert cache.get(("2026-10-03", 1)) == b"c"
+
+
+def test_nova_versao_dos_dados_nao_acerta_o_cache():
+    cache = ReportCache()
+    cache.put(("2026-10-01", 1), b"a")
+    assert cache.get(("2026-10-01", 2)) is None
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+from eventos import inserir, manutencao
+from records import PrefixIndex, RecordTable
+from storage import Evento
+from tabelas import MANUTENCAO, PRODUCAO, operacoes_aleatorias
+
+
+@pytest.mark.parametrize("semente", range(5))
+def test_prefix_index_igual_a_busca_linear(semente):
+    _, _, modelo, _, indice_ns = operacoes_aleatorias(semente)
+    todos = sorted(set(modelo["producao"]) | set(modelo["manutencao"]))
+    for prefixo in ("", "G", "GF0", "GF42", "RN", "X"):
+        esperado = [ns for ns in todos if ns.startswith(prefixo)]
+        assert indice_ns.contar(prefixo) == len(esperado)
+        assert indice_ns.buscar(prefixo, limite=7) == esperado[:7]
+
+
+def test_prefix_index_recomeca_depois_de_carregar():
+    producao = RecordTable(PRODUCAO)
+    manutencao = RecordTable(MANUTENCAO)
+    indice_ns = PrefixIndex(producao, manutencao)
+    producao.carregar([("A1", "2026-10-01", "08:00:00")])
+    assert indice_ns.buscar("A") == ["A1"]
+    producao.carregar([("B1", "2026-10-01", "08:00:00")])
+    manutencao.carregar([("B2", "Estoque", "2026-10-01", "08:00:00")])
+    assert indice_ns.buscar("A") == []
+    assert indice_ns.buscar("B") == ["B1", "B2"]
+
+
+def test_busca_por_prefixo_e_posicao_no_arquivo(estacoes):
+    s1, _ = estacoes
+    s1.apply([inserir("GF10", "2026-09-02", "10:00:00"), inserir("GF11", "2026-09-02", "09:00:00"),
+              inserir("GF12", "2026-09-03"), inserir("XX01", "2026-09-02", "11:00:00"),
+              inserir("GF13", "2026-10-01")])
+    s1.close_partitions("2026-10-01")
+    assert [r["NS"] for r in s1.find_archived_prefix("GF1")] == ["GF10", "GF11", "GF12"]
+    assert [r["NS"] for r in s1.find_archived_prefix("GF", limite=2)] == ["GF10", "GF11"]
+    assert s1.find_archived_prefix("Z") == []
+
+    posicao, id_ = s1.archived_position("GF10")
+    dia = s1.range_view("2026-09-02", "2026-09-02")
+    assert [valores[0] for _, valores in dia.fatia(0, len(dia))] == ["GF11", "GF10", "XX01"]
+    assert dia.fatia(posicao, posicao + 1) == [(id_, ("GF10", "2026-09-02", "10:00:00"))]
+    assert s1.archived_position("GF13") is None
+
+
+def test_busca_no_arquivo_nao_espera_o_lote_em_gravacao(estacoes):
+    # A persistência segura o lock da conexão durante todo o lote; a busca da
+    # interface usa outra conexão e responde mesmo assim
+    s1, _ = estacoes
+    s1.apply([inserir("GF10", "2026-09-02"), manutencao("GF20")])
+    s1.close_partitions("2026-10-01")
+    s1.apply([Evento("Manutencao", "remover", "GF20", None)])
+    gravando, fim = threading.Event(), threading.Event()
+
+    def lote_longo():
+        with s1._lock:
+            gravando.set()
+            fim.wait(5)
+
+    threading.Thread(target=lote_longo).start()
+    gravando.wait(5)
+    try:
+        resultados = []
+        busca = threading.Thread(target=lambda: resultados.append(
+            (s1.find_archived_prefix("GF"), s1.released_among(["GF10", "GF20"]))))
+        busca.start()
+        busca.join(2)
+        assert resultados == [([{"NS": "GF10", "Data": "2026-09-02", "Hora": "08:00:00"}], {"GF20"})]
+    finally:
+        fim.set()
@@ -0,0 +1,50 @@
+import sqlite3
+
+import pytest
+
+import storage as armazenamento
+from eventos import inserir
+from storage import SQLiteStorage, open_storage
+
+
+def marca_de_migracao(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return conn.execute("SELECT valor FROM meta WHERE chave = 'migrado'").fetchall()
+    finally:
+        conn.close()
+
+
+def test_migracao_que_falha_e_tentada_de_novo(tmp_path, monkeypatch):
+    legado = tmp_path / "producao.xlsx"
+    legado.write_bytes(b"")
+    banco = str(tmp_path / "producao.db")
+    planilhas = {
+        "Producao": [("A", "2026-10-01", "08:00:00"), (None, "2026-10-01", "09:00:00")],  # NS vazio no meio
+        "Manutencao": [],
+    }
+    monkeypatch.setattr(armazenamento.ExcelStorage, "load", lambda self, desde=None: planilhas)
+    for _ in range(2):
+        with pytest.raises(sqlite3.IntegrityError):
+            open_storage(banco, legado=str(legado))
+        # Nada do que foi lido antes da falha fica no banco, nem a marca
+        assert marca_de_migracao(banco) == []
+        storage = SQLiteStorage(banco)
+        assert storage.load()["Producao"] == []
+        assert storage.needs_import()
+        storage.close()
+
+    planilhas["Producao"].pop()
+    storage = open_storage(banco, legado=str(legado))
+    assert storage.load()["Producao"] == [("A", "2026-10-01", "08:00:00")]
+    assert not storage.needs_import()
+    storage.close()
+    assert marca_de_migracao(banco) == [(str(legado),)]
+
+
+def test_banco_com_dados_anterior_a_marca_nao_e_migrado(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "producao.db"))
+    assert storage.needs_import()
+    storage.apply([inserir("A", "2026-10-01")])
+    assert not storage.needs_import()
+    storage.close()
@@ -0,0 +1,42 @@
+from eventos import inserir, manutencao
+from storage import Evento
+
+
+def test_alteracoes_chegam_a_outra_estacao(estacoes):
+    s1, s2 = estacoes
+    s2.load()
+    s1.apply([inserir("A", "2026-10-01"), manutencao("M")])
+    s1.apply([Evento("Producao", "editar", "A", {"Hora": "09:00:00"})])
+    eventos, completo = s2.changes_since()
+    assert completo
+    assert [(e.tabela, e.acao, e.ns) for e in eventos] == [
+        ("Producao", "inserir", "A"), ("Manutencao", "inserir", "M"), ("Producao", "editar", "A")]
+    # As próprias alterações não voltam
+    assert s1.changes_since() == ([], True)
+
+
+def test_ns_duplicado_entre_estacoes_e_recusado(estacoes):
+    s1, s2 = estacoes
+    assert s1.apply([inserir("A", "2026-10-01")]) == []
+    recusados = s2.apply([inserir("A", "2026-10-02"), manutencao("A")])
+    assert [e.acao for e in recusados] == ["inserir", "inserir"]
+    assert s2.load()["Producao"] == [("A", "2026-10-01", "08:00:00")]
+    assert s2.existing(["A", "B"]) == {"A"}
+
+
+def test_renomear_para_ns_existente_e_recusado(estacoes):
+    s1, s2 = estacoes
+    s1.apply([inserir("A", "2026-10-01"), inserir("B", "2026-10-01")])
+    recusados = s2.apply([Evento("Producao", "editar", "A", {"NS": "B"})])
+    assert len(recusados) == 1
+    assert sorted(ns for ns, _, _ in s1.load()["Producao"]) == ["A", "B"]
+
+
+def test_journal_podado_pede_releitura(estacoes):
+    s1, s2 = estacoes
+    s2.load()
+    s1.EVENTOS_MANTIDOS = 1
+    s1.apply([inserir("A", "2026-10-01"), inserir("B", "2026-10-01"), inserir("C", "2026-10-01")])
+    s1.prune_events()
+    _, completo = s2.changes_since()
+    assert not completo